@@ -0,0 +1,224 @@
+"""Benchmark suite for the tutor tools.
+
+Runs every workload in `benchmarks/workloads/*.json` against the synchronous
+tool functions and reports latency percentiles, peak traced memory and the
+size of the JSON payload returned to the model. Results are compared against
+`benchmarks/baseline.json`; any regression beyond the tolerance makes the
+script exit with status 1.
+
+Usage:
+    python benchmarks/run_benchmarks.py                     # run and compare
+    python benchmarks/run_benchmarks.py --only plotting     # one tool
+    python benchmarks/run_benchmarks.py --update-baseline   # record a new baseline
+
+Timings are only comparable on the machine that recorded the baseline, so
+re-record it (and commit it) when the reference machine changes.
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+from tutor_agent.tools.calculator import calculator_tool  # noqa: E402
+from tutor_agent.tools.circuit_visualization import circuit_visualization_tool  # noqa: E402
+from tutor_agent.tools.formula_lookup import formula_lookup_tool  # noqa: E402
+from tutor_agent.tools.plotting import plotting_tool  # noqa: E402
+from tutor_agent.tools.symbolic_math import symbolic_math_tool  # noqa: E402
+
+try:
+    from sympy.core.cache import clear_cache
+except ImportError:
+    def clear_cache():
+        pass
+
+WORKLOADS_DIR = ROOT / "workloads"
+BASELINE_PATH = ROOT / "baseline.json"
+
+TOOLS: Dict[str, Callable[..., dict]] = {
+    "calculator": calculator_tool,
+    "symbolic_math": symbolic_math_tool,
+    "formula_lookup": formula_lookup_tool,
+    "plotting": plotting_tool,
+    "circuit_visualization": circuit_visualization_tool,
+}
+
+# Differences smaller than these are treated as noise, whatever the ratio.
+MIN_LATENCY_DELTA = 0.0005  # seconds
+MIN_MEMORY_DELTA = 64 * 1024  # bytes
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _time_once(func: Callable[..., dict], args: Dict[str, Any]) -> Tuple[float, Any]:
+    # SymPy memoizes results; start every run from a cold cache so each
+    # sample measures the actual computation.
+    clear_cache()
+    gc.collect()
+    start = time.perf_counter()
+    result = func(tool_context=None, **args)
+    return time.perf_counter() - start, result
+
+
+def _summarize_case(
+    func: Callable[..., dict], args: Dict[str, Any], timings: List[float], result: Any
+) -> Dict[str, Any]:
+    # Memory is measured in a separate run, tracemalloc slows execution down.
+    clear_cache()
+    gc.collect()
+    tracemalloc.start()
+    func(tool_context=None, **args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "min": timings[0],
+        "p50": _percentile(timings, 0.50),
+        "p90": _percentile(timings, 0.90),
+        "p99": _percentile(timings, 0.99),
+        "mean": statistics.fmean(timings),
+        "peak_memory_bytes": peak,
+        "payload_bytes": len(json.dumps(result, default=str)),
+        "error": result.get("error") if isinstance(result, dict) else None,
+    }
+
+
+def run(
+    only: List[str], repeat: int, warmup: int, keys: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    cases = {}
+    for tool_name, func in TOOLS.items():
+        if only and tool_name not in only:
+            continue
+        with open(WORKLOADS_DIR / f"{tool_name}.json", encoding="utf-8") as f:
+            for case in json.load(f):
+                key = f"{tool_name}/{case['name']}"
+                if keys is None or key in keys:
+                    cases[key] = (func, case["args"], case.get("repeat", repeat))
+
+    for func, args, _ in cases.values():
+        for _ in range(warmup):
+            func(tool_context=None, **args)
+
+    # The speed of a shared machine drifts over seconds, so the runs of all
+    # cases are interleaved: every case is timed across the whole run.
+    timings: Dict[str, List[float]] = {key: [] for key in cases}
+    last_results: Dict[str, Any] = {}
+    for round_index in range(max((n for _, _, n in cases.values()), default=0)):
+        for key, (func, args, case_repeat) in cases.items():
+            if round_index < case_repeat:
+                elapsed, last_results[key] = _time_once(func, args)
+                timings[key].append(elapsed)
+
+    results = {}
+    for key, (func, args, _) in cases.items():
+        results[key] = _summarize_case(func, args, timings[key], last_results.get(key))
+        r = results[key]
+        print(
+            f"{key:<48} min {r['min'] * 1000:9.3f} ms  p50 {r['p50'] * 1000:9.3f} ms  p90 {r['p90'] * 1000:9.3f} ms  "
+            f"p99 {r['p99'] * 1000:9.3f} ms  peak {r['peak_memory_bytes'] / 1024:9.1f} KiB  "
+            f"payload {r['payload_bytes']:>8} B"
+            + (f"  error: {r['error']}" if r["error"] else "")
+        )
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key}: no baseline, skipped")
+            continue
+        # Noise on a shared machine only ever adds time, so the fastest run is
+        # the most repeatable figure; even p50 of ten runs swings by over 30%.
+        limit = max(previous["min"] * (1 + tolerance), previous["min"] + MIN_LATENCY_DELTA)
+        if current["min"] > limit:
+            regressions.append(
+                f"{key}: min {current['min'] * 1000:.3f} ms > baseline {previous['min'] * 1000:.3f} ms"
+            )
+        limit = max(
+            previous["peak_memory_bytes"] * (1 + tolerance),
+            previous["peak_memory_bytes"] + MIN_MEMORY_DELTA,
+        )
+        if current["peak_memory_bytes"] > limit:
+            regressions.append(
+                f"{key}: peak memory {current['peak_memory_bytes']} B > baseline {previous['peak_memory_bytes']} B"
+            )
+        if current["payload_bytes"] > previous["payload_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: payload {current['payload_bytes']} B > baseline {previous['payload_bytes']} B"
+            )
+        if current["error"] and not previous.get("error"):
+            regressions.append(f"{key}: now fails with {current['error']!r}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", default=[], choices=sorted(TOOLS), help="Tools to benchmark.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case (a workload may override it).")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per case.")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--baseline-runs", type=int, default=3, help="Runs of the suite a new baseline is taken from.")
+    args = parser.parse_args()
+
+    results = run(args.only, args.repeat, args.warmup)
+
+    if args.update_baseline:
+        # One run's fastest sample may come from an unusually fast stretch of
+        # the machine; the median over several runs is what later runs reach.
+        runs = [results] + [run(args.only, args.repeat, args.warmup) for _ in range(args.baseline_runs - 1)]
+        for key in results:
+            ranked = sorted((r[key] for r in runs), key=lambda r: r["min"])
+            results[key] = ranked[len(ranked) // 2]
+        baseline = {}
+        if BASELINE_PATH.exists():
+            baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        baseline.update(
+            {
+                key: {k: (round(v, 6) if isinstance(v, float) else v) for k, v in r.items()}
+                for key, r in results.items()
+            }
+        )
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("No baseline found; run with --update-baseline first.")
+        return 1
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        # A case can still land on a slow stretch of the machine; only report
+        # it if a second measurement is slow too.
+        suspects = sorted({regression.split(": ", 1)[0] for regression in regressions})
+        print(f"\nRe-measuring {len(suspects)} case(s):")
+        for key, r in run(args.only, args.repeat, args.warmup, suspects).items():
+            results[key]["min"] = min(results[key]["min"], r["min"])
+        regressions = compare({key: results[key] for key in suspects}, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
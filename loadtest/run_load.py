@@ -0,0 +1,283 @@
+"""Load generator for the tutor API.
+
+Drives concurrent sessions against a running server over `/run_sse` and
+reports throughput, time to first event and per-stage latency. Run the
+server on the scripted stand-in model so no Gemini quota is spent and the
+numbers measure orchestration and tool overhead only:
+
+    TUTOR_AGENT_MODEL=stand-in uvicorn main:app --port 8080
+    python loadtest/run_load.py --url http://localhost:8080 --concurrency 20 --sessions 200
+
+Each session sends `--turns` messages picked round-robin from the scenarios
+in `loadtest/scenarios.json` (or `--scenario NAME`). Stages are attributed
+from the arrival time of each SSE event:
+    model:<agent>   time until an agent's event that carries a model reply
+    tool:<name>     time from the function call event to its response event
+                    (calls made together are answered in one event, so each
+                    is timed to that event)
+    transfer        time to execute transfer_to_agent
+Model stages include the scripted latency, so subtract it (or set the
+script's latencies to 0) to isolate orchestration overhead.
+
+With `--progress` the streams also carry tool progress frames, and a frame
+that arrives before the event with its function call counts as an error.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent
+APP_NAME = "tutor_agent"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": _percentile(values, 0.50),
+        "p90": _percentile(values, 0.90),
+        "p99": _percentile(values, 0.99),
+        "mean": statistics.fmean(values),
+        "max": values[-1],
+    }
+
+
+class Results:
+    """Latency samples collected across all sessions."""
+
+    def __init__(self):
+        self.turn_latencies: List[float] = []
+        self.first_event: List[float] = []
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.events = 0
+
+    def add_error(self, error: str):
+        self.errors[error[:200]] += 1
+
+
+def _record_turn(events: List[tuple], sent: float, results: Results):
+    """Attributes the gaps between SSE events of one turn to stages."""
+    if not events:
+        return
+    results.first_event.append(events[0][0] - sent)
+
+    previous = sent
+    pending_calls: Dict[str, tuple] = {}
+    for arrived, event in events:
+        parts = (event.get("content") or {}).get("parts") or []
+        author = event.get("author", "")
+        calls = [p["functionCall"] for p in parts if p.get("functionCall")]
+        responses = [p["functionResponse"] for p in parts if p.get("functionResponse")]
+        if responses:
+            for response in responses:
+                name = response.get("name", "")
+                call = pending_calls.pop(response.get("id"), None)
+                start = call[0] if call else previous
+                stage = "transfer" if name == "transfer_to_agent" else f"tool:{name}"
+                results.stages[stage].append(arrived - start)
+        elif calls or any(p.get("text") for p in parts):
+            results.stages[f"model:{author}"].append(arrived - previous)
+            for call in calls:
+                pending_calls[call.get("id")] = (arrived, call.get("name"))
+        previous = arrived
+
+
+def _check_progress_order(events: List[dict], progress: dict, results: Results):
+    """Counts an error when a progress frame precedes its function call."""
+    call_id = progress.get("progress", {}).get("functionCallId")
+    for event in events:
+        parts = (event.get("content") or {}).get("parts") or []
+        if any((p.get("functionCall") or {}).get("id") == call_id for p in parts):
+            return
+    results.add_error(f"progress before its function call: {progress['progress'].get('tool')}")
+
+
+async def _run_turn(
+    client: httpx.AsyncClient,
+    user_id: str,
+    session_id: str,
+    message: str,
+    results: Results,
+    progress: bool = False,
+):
+    body = {
+        "app_name": APP_NAME,
+        "user_id": user_id,
+        "session_id": session_id,
+        "new_message": {"role": "user", "parts": [{"text": message}]},
+        "streaming": False,
+    }
+    events = []
+    event_type = ""
+    sent = time.perf_counter()
+    try:
+        params = {"progress": "1"} if progress else {}
+        async with client.stream("POST", "/run_sse", params=params, json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                results.add_error(f"HTTP {response.status_code}: {response.text}")
+                return
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event_type = line[6:].strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if event_type == "progress":
+                    event_type = ""
+                    _check_progress_order([e for _, e in events], event, results)
+                    continue
+                if "error" in event and "author" not in event:
+                    results.add_error(f"stream: {event['error']}")
+                    continue
+                events.append((time.perf_counter(), event))
+    except httpx.HTTPError as e:
+        results.add_error(f"{type(e).__name__}: {e}")
+        return
+    results.turn_latencies.append(time.perf_counter() - sent)
+    results.events += len(events)
+    _record_turn(events, sent, results)
+
+
+async def _run_session(
+    client: httpx.AsyncClient, messages, turns: int, results: Results, progress: bool = False
+):
+    user_id = f"load-{uuid.uuid4().hex[:8]}"
+    try:
+        response = await client.post(f"/apps/{APP_NAME}/users/{user_id}/sessions", json={})
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        results.add_error(f"create session: {e}")
+        return
+    session_id = response.json()["id"]
+    for _ in range(turns):
+        await _run_turn(client, user_id, session_id, next(messages), results, progress)
+
+
+async def run(
+    url: str,
+    concurrency: int,
+    sessions: int,
+    turns: int,
+    messages: List[str],
+    token: Optional[str],
+    timeout: float,
+    progress: bool = False,
+) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    results = Results()
+    message_cycle = itertools.cycle(messages)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, timeout=timeout, limits=limits) as client:
+
+        async def bounded():
+            async with semaphore:
+                await _run_session(client, message_cycle, turns, results, progress)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(sessions)))
+        elapsed = time.perf_counter() - started
+
+    report: Dict[str, Any] = {
+        "elapsed_seconds": elapsed,
+        "turns": len(results.turn_latencies),
+        "errors": dict(results.errors),
+        "throughput_turns_per_second": len(results.turn_latencies) / elapsed if elapsed else 0.0,
+        "events_per_second": results.events / elapsed if elapsed else 0.0,
+    }
+    if results.turn_latencies:
+        report["turn_latency"] = _summarize(results.turn_latencies)
+    if results.first_event:
+        report["time_to_first_event"] = _summarize(results.first_event)
+    report["stages"] = {
+        stage: _summarize(values) for stage, values in sorted(results.stages.items())
+    }
+    return report
+
+
+def _print_report(report: Dict[str, Any]):
+    print(
+        f"{report['turns']} turns in {report['elapsed_seconds']:.2f} s: "
+        f"{report['throughput_turns_per_second']:.2f} turns/s, "
+        f"{report['events_per_second']:.2f} events/s"
+    )
+    rows = []
+    for label in ("turn_latency", "time_to_first_event"):
+        if label in report:
+            rows.append((label, report[label]))
+    rows.extend(report["stages"].items())
+    print(f"\n{'stage':<36} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, s in rows:
+        print(
+            f"{label:<36} {s['count']:>6} {s['p50'] * 1000:9.1f} {s['p90'] * 1000:9.1f} "
+            f"{s['p99'] * 1000:9.1f} {s['max'] * 1000:9.1f}"
+        )
+    if report["errors"]:
+        print("\nErrors:")
+        for error, count in report["errors"].items():
+            print(f"  {count:>5} x {error}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080", help="Base URL of the server.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Sessions in flight at once.")
+    parser.add_argument("--sessions", type=int, default=50, help="Total sessions to run.")
+    parser.add_argument("--turns", type=int, default=1, help="Messages sent per session.")
+    parser.add_argument("--scenarios", type=Path, default=ROOT / "scenarios.json", help="Stand-in script to take messages from.")
+    parser.add_argument("--scenario", action="append", default=[], help="Only send this scenario's message (repeatable).")
+    parser.add_argument("--token", help="Bearer token, if the server sets AUTH_TOKEN.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--progress", action="store_true", help="Request progress frames and check they follow their function calls.")
+    parser.add_argument("--output", type=Path, help="Also write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    script = json.loads(args.scenarios.read_text(encoding="utf-8"))
+    messages = [
+        scenario["message"]
+        for scenario in script["scenarios"]
+        if "message" in scenario and (not args.scenario or scenario["name"] in args.scenario)
+    ]
+    if not messages:
+        print("No scenario messages to send.")
+        return 1
+
+    report = asyncio.run(
+        run(
+            args.url,
+            args.concurrency,
+            args.sessions,
+            args.turns,
+            messages,
+            args.token,
+            args.timeout,
+            args.progress,
+        )
+    )
+    _print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import hmac
+import logging
 import os
 import warnings
 from pathlib import Path
@@ -8,42 +10,41 @@ warnings.filterwarnings(
     "ignore",
     message="Default value is not supported in function declaration schema for Google AI",
 )
-from fastapi import FastAPI, APIRouter, HTTPException, Request  # noqa: E402
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request  # noqa: E402
 from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
-from fastapi.responses import RedirectResponse, FileResponse  # noqa: E402
-from fastapi.staticfiles import StaticFiles  # noqa: E402
+from fastapi.responses import RedirectResponse, PlainTextResponse  # noqa: E402
 from google.adk.cli.fast_api import get_fast_api_app  # noqa: E402
 import google.adk.cli.fast_api as fast_api  # noqa: E402
+from tutor_agent.shared_libs import metrics  # noqa: E402
+from tutor_agent.shared_libs.compression import (  # noqa: E402
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+)
+from tutor_agent.shared_libs.profiler import (  # noqa: E402
+    ProfilerBusyError,
+    ProfilingMiddleware,
+    profiler,
+)
+from tutor_agent.shared_libs.progress import ProgressStreamMiddleware  # noqa: E402
+from tutor_agent.shared_libs.scheduling import tool_scheduler  # noqa: E402
 
 # https://github.com/google/adk-python/issues/51
 
 # Get the agent directory path
 AGENT_DIR = Path(__file__).parent / "tutor_agent"
 
-app: FastAPI = get_fast_api_app(
-    agent_dir=AGENT_DIR,
-    web=False,  # Setting this to True invalidates any additional routes
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
-    allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods
-    allow_headers=["*"],  # Allows all headers
-)
-
 # Authentication configuration
 AUTH_TOKEN = os.environ.get("AUTH_TOKEN")
-if not AUTH_TOKEN:
-    print(
-        "Warning: AUTH_TOKEN environment variable not set. Authentication will be disabled."
-    )
+# Admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Tool progress frames (POST /run_sse?progress=1) and idle heartbeats for /run_sse
+PROGRESS_HEARTBEAT_SECONDS = float(os.environ.get("PROGRESS_HEARTBEAT_SECONDS", 15))
+# Compress JSON/text responses of at least this many bytes
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+SERVE_WEB_INTERFACE = os.environ.get("SERVE_WEB_INTERFACE")
 
 
 # Authentication middleware
-@app.middleware("http")
 async def auth_middleware(request: Request, call_next):
     # Skip authentication for health endpoint
     if request.url.path == "/health":
@@ -85,23 +86,134 @@ async def health():
     return {"status": "ok"}
 
 
-app.include_router(health_router)
+@health_router.get("/tools/stats")
+async def tool_stats():
+    # Queue depths, wait times and rejections per tool
+    return tool_scheduler.snapshot()
 
-SERVE_WEB_INTERFACE = os.environ.get("SERVE_WEB_INTERFACE")
 
-if SERVE_WEB_INTERFACE:
-    BASE_DIR = Path(fast_api.__file__).parent.resolve()
-    ANGULAR_DIST_PATH = BASE_DIR / "browser"
+@health_router.get("/metrics")
+async def prometheus_metrics():
+    # Rendered only when scraped; recording is a counter/bucket increment
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+admin_router = APIRouter(prefix="/admin")
+
+
+@admin_router.post("/profile")
+async def profile(
+    seconds: float | None = Query(None, gt=0, le=300),
+    requests: int | None = Query(None, gt=0, le=1000),
+    path: str = "",
+    session_id: str = "",
+    timeout: float = Query(60, gt=0, le=600),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    x_admin_token: str | None = Header(None),
+):
+    """
+    Samples this worker's stacks and returns them in the collapsed-stack format.
+
+    Either for `seconds`, or for the next `requests` requests matching `path`
+    (prefix) and/or `session_id`, giving up after `timeout` seconds.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if (seconds is None) == (requests is None):
+        raise HTTPException(
+            status_code=400, detail="Pass exactly one of 'seconds' or 'requests'"
+        )
+
+    interval = interval_ms / 1000
+    try:
+        if seconds is not None:
+            collapsed = await profiler.profile_for(seconds, interval)
+        else:
+            collapsed = await profiler.profile_requests(
+                requests, path, session_id, timeout, interval
+            )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the API server: ADK's app with our middlewares and routes.
+
+    Returns:
+        The FastAPI app.
+    """
+    app: FastAPI = get_fast_api_app(
+        agent_dir=str(AGENT_DIR),  # ADK appends it to sys.path, which must hold str
+        web=False,  # Setting this to True invalidates any additional routes
+    )
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allows all origins
+        allow_credentials=True,
+        allow_methods=["*"],  # Allows all methods
+        allow_headers=["*"],  # Allows all headers
+    )
+
+    # Emit one JSON line per finished agent/model/transfer/tool span
+    if os.environ.get("TRACE_SPANS"):
+        trace_handler = logging.StreamHandler()
+        trace_handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger = logging.getLogger("tutor_agent.trace")
+        trace_logger.addHandler(trace_handler)
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+
+    if not AUTH_TOKEN:
+        print(
+            "Warning: AUTH_TOKEN environment variable not set. Authentication will be disabled."
+        )
+    # Inside the auth middleware: BaseHTTPMiddleware relays the body through a
+    # queue, so wrapping it would let progress frames overtake their events.
+    app.add_middleware(ProgressStreamMiddleware, heartbeat_interval=PROGRESS_HEARTBEAT_SECONDS)
+    app.middleware("http")(auth_middleware)
+    app.include_router(health_router)
+    app.include_router(admin_router)
+
+    app.add_middleware(ProfilingMiddleware)
+
+    # Streams (e.g. /run_sse) are compressed chunk by chunk and flushed after every event
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+    if SERVE_WEB_INTERFACE:
+        BASE_DIR = Path(fast_api.__file__).parent.resolve()
+        ANGULAR_DIST_PATH = BASE_DIR / "browser"
+        # gzip/brotli variants are computed once here, at startup
+        static_files = PrecompressedStaticFiles(directory=ANGULAR_DIST_PATH, html=True)
+
+        @app.get("/")
+        async def redirect_to_dev_ui():
+            return RedirectResponse("/dev-ui")
+
+        @app.get("/dev-ui")
+        async def dev_ui(request: Request):
+            return await static_files.get_response("index.html", request.scope)
+
+        app.mount("/", static_files, name="static")
 
-    @app.get("/")
-    async def redirect_to_dev_ui():
-        return RedirectResponse("/dev-ui")
+    return app
 
-    @app.get("/dev-ui")
-    async def dev_ui():
-        return FileResponse(BASE_DIR / "browser/index.html")
 
-    app.mount("/", StaticFiles(directory=ANGULAR_DIST_PATH, html=True), name="static")
+# The tool process pool's workers import this module as __mp_main__ when the
+# server runs as `python main.py`; they must not build a second app.
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     # Use the PORT environment variable provided by Cloud Run, defaulting to 8080
@@ -5,10 +5,18 @@ from google.adk.agents import Agent
 from tutor_agent.sub_agents.math_agent.agent import math_agent
 from tutor_agent.sub_agents.physics_agent.agent import physics_agent
 
+from tutor_agent.shared_libs.models import agent_model
+from tutor_agent.tools.fast_path import answer_directly
 from tutor_agent.tools.memory import _load_precreated_itinerary
+from tutor_agent.tools.tracing import (
+    trace_agent_end,
+    trace_agent_start,
+    trace_model_end,
+    trace_model_start,
+)
 
 root_agent = Agent(
-    model="gemini-2.0-flash",
+    model=agent_model("root_agent"),
     name="root_agent",
     description="AI Tutor using the services of multiple sub-agents",
     instruction=prompt.ROOT_AGENT_INSTR,
@@ -16,5 +24,8 @@ root_agent = Agent(
         math_agent,
         physics_agent
     ],
-    before_agent_callback=_load_precreated_itinerary,
+    before_agent_callback=[trace_agent_start, _load_precreated_itinerary, answer_directly],
+    after_agent_callback=trace_agent_end,
+    before_model_callback=trace_model_start,
+    after_model_callback=trace_model_end,
 )
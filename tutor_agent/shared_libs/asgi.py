@@ -0,0 +1,37 @@
+"""Small helpers shared by the ASGI middlewares."""
+
+import json
+from typing import Optional
+
+
+async def buffer_body(receive):
+    """Reads the whole request body and returns a receive that replays it."""
+    messages = []
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return replay, body
+
+
+def session_id_from_body(body: bytes) -> Optional[str]:
+    """Returns the session id of an ADK run request body, if it has one."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    # ADK request models accept both snake_case and camelCase field names.
+    return payload.get("session_id") or payload.get("sessionId")
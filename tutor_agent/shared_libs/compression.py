@@ -0,0 +1,339 @@
+"""Response compression for the API and precompressed static assets.
+
+`CompressionMiddleware` compresses text and JSON responses with brotli (when
+the optional `brotli` package is installed) or gzip. Complete responses below
+`minimum_size` are sent as is. Streamed responses, including the
+`text/event-stream` responses of `/run_sse`, are flushed after every chunk, so
+each event still reaches the client as soon as it is produced.
+
+`PrecompressedStaticFiles` compresses the static files of a directory once,
+when it is created, and serves the smallest variant the client accepts with
+a strong ETag. Files with a content hash in their name (e.g.
+`main-QOEMUXM4.js`) are marked immutable; other files must be revalidated.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from tutor_agent.shared_libs import metrics
+from tutor_agent.shared_libs.executors import run_in_thread
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MINIMUM_SIZE = 1024
+# Chunks larger than this are compressed on the thread pool, not the loop.
+OFFLOAD_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+STATIC_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".map", ".svg", ".txt", ".xml", ".ico"}
+
+# A name part of 8+ letters/digits with at least one digit, before the extension.
+HASHED_NAME = re.compile(r"[.-](?=[A-Za-z0-9]*\d)[A-Za-z0-9]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _available_encodings() -> Sequence[str]:
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str, offered: Sequence[str]) -> Optional[str]:
+    """
+    Picks a content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header.
+        offered: The codings the server can produce, most preferred first.
+    Returns:
+        The first offered coding the client accepts, or None.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in offered:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.process(data)
+        return out + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses text and JSON responses.
+
+    Responses that already have a Content-Encoding, ask for no-transform, or
+    are not text/JSON are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), _available_encodings()
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """Holds back the response start until the first body chunk is known."""
+
+    def __init__(self, middleware: CompressionMiddleware, send, encoding: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.start_message = None
+        self.stream = None
+        self.passthrough = False
+        self.pending = []
+        self.pending_size = 0
+
+    def _new_stream(self):
+        if self.encoding == "br":
+            return _BrotliStream(self.middleware.brotli_quality)
+        return _GzipStream(self.middleware.gzip_level)
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) > OFFLOAD_SIZE:
+            compressed = await run_in_thread(self.stream.compress, data, final)
+        else:
+            compressed = self.stream.compress(data, final)
+        metrics.RESPONSE_BYTES.labels(self.encoding, "uncompressed").inc(len(data))
+        metrics.RESPONSE_BYTES.labels(self.encoding, "compressed").inc(len(compressed))
+        return compressed
+
+    def _is_eligible(self, headers: MutableHeaders) -> bool:
+        status = self.start_message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        return _is_compressible(headers.get("content-type", ""))
+
+    async def _send_start(self):
+        await self._send(self.start_message)
+        self.start_message = None
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+        if self.passthrough or message_type != "http.response.body":
+            if self.start_message is not None:
+                await self._send_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is not None:
+            body = await self._compress(body, final=not more_body)
+            if body or not more_body:
+                await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(raw=list(self.start_message["headers"]))
+        self.start_message["headers"] = headers.raw
+        if not self._is_eligible(headers):
+            self.passthrough = True
+            await self._send_start()
+            await self._send(message)
+            return
+
+        # Responses streamed by other middleware arrive in pieces; collect them
+        # until the threshold is reached. Event streams are never held back.
+        self.pending.append(body)
+        self.pending_size += len(body)
+        event_stream = headers.get("content-type", "").startswith("text/event-stream")
+        if more_body and not event_stream and self.pending_size < self.middleware.minimum_size:
+            return
+        body = b"".join(self.pending)
+        self.pending = []
+
+        if not more_body and len(body) < self.middleware.minimum_size:
+            self.passthrough = True
+            await self._send_start()
+            await self._send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        self.stream = self._new_stream()
+        body = await self._compress(body, final=not more_body)
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+        if more_body:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(len(body))
+        await self._send_start()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+@dataclass(frozen=True)
+class _Variant:
+    body: bytes
+    etag: str
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves gzip/brotli variants computed at startup.
+
+    Files that change after startup are served from disk uncompressed.
+    """
+
+    def __init__(self, *, directory, html: bool = False, minimum_size: int = DEFAULT_MINIMUM_SIZE, **kwargs):
+        super().__init__(directory=directory, html=html, **kwargs)
+        # full path -> (mtime_ns, {encoding: variant})
+        self._variants: Dict[str, Tuple[int, Dict[str, _Variant]]] = {}
+        self._precompress(minimum_size)
+
+    def _precompress(self, minimum_size: int):
+        started = time.perf_counter()
+        original_bytes = compressed_bytes = 0
+        for directory in self.all_directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    full_path = os.path.realpath(os.path.join(root, name))
+                    if os.path.splitext(name)[1].lower() not in STATIC_SUFFIXES:
+                        continue
+                    with open(full_path, "rb") as f:
+                        content = f.read()
+                    if len(content) < minimum_size:
+                        continue
+                    stat_result = os.stat(full_path)
+                    digest = hashlib.blake2b(content, digest_size=12).hexdigest()
+                    variants = {}
+                    encoded = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+                    if BROTLI_AVAILABLE:
+                        encoded["br"] = brotli.compress(content, quality=11)
+                    for encoding, body in encoded.items():
+                        if len(body) < len(content):
+                            variants[encoding] = _Variant(body, f'"{digest}-{encoding}"')
+                    if variants:
+                        self._variants[full_path] = (stat_result.st_mtime_ns, variants)
+                        original_bytes += len(content)
+                        compressed_bytes += min(len(v.body) for v in variants.values())
+        logger.info(
+            "Precompressed %d static files (%d -> %d bytes) in %.2f s",
+            len(self._variants),
+            original_bytes,
+            compressed_bytes,
+            time.perf_counter() - started,
+        )
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        name = os.path.basename(full_path)
+        cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(name) else REVALIDATE_CACHE_CONTROL
+
+        entry = self._variants.get(os.fspath(full_path))
+        if entry is not None and entry[0] != stat_result.st_mtime_ns:
+            entry = None
+        encoding = None
+        if entry is not None and status_code == 200:
+            encoding = negotiate_encoding(
+                request_headers.get("accept-encoding", ""),
+                [e for e in _available_encodings() if e in entry[1]],
+            )
+
+        if encoding is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["cache-control"] = cache_control
+            if entry is not None:
+                response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+        variant = entry[1][encoding]
+        response = Response(
+            variant.body,
+            status_code=status_code,
+            media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+            headers={
+                "content-encoding": encoding,
+                "etag": variant.etag,
+                "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+                "cache-control": cache_control,
+                "vary": "Accept-Encoding",
+            },
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,3 +1,14 @@
 """Constants used as keys into ADK's session state."""
 
 SYSTEM_TIME = "_time"
+
+# Student profile, loaded from the profile store (see tools/memory.py).
+GRADE_LEVEL = "grade_level"
+PREFERRED_UNITS = "preferred_units"
+WEAK_TOPICS = "weak_topics"
+
+DEFAULT_STUDENT_PROFILE = {
+    GRADE_LEVEL: "unknown",
+    PREFERRED_UNITS: "SI",
+    WEAK_TOPICS: [],
+}
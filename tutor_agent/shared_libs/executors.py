@@ -0,0 +1,110 @@
+"""Bounded executors for running blocking tool work off the event loop.
+
+NumPy releases the GIL for most array work, so it runs on a thread pool.
+SymPy and the drawing libraries are pure Python and hold the GIL, so they run
+on a process pool. Both pools are created lazily on first use and shared by
+every session served by this process.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+THREAD_POOL_WORKERS = int(os.environ.get("TOOL_THREAD_WORKERS", 8))
+PROCESS_POOL_WORKERS = int(
+    os.environ.get("TOOL_PROCESS_WORKERS", min(4, os.cpu_count() or 1))
+)
+
+# Imported once by the fork server, so worker processes start with SymPy and
+# schemdraw already loaded.
+_PROCESS_PRELOAD = [
+    "tutor_agent.tools.symbolic_math",
+    "tutor_agent.tools.circuit_visualization",
+]
+
+_lock = threading.Lock()
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=THREAD_POOL_WORKERS, thread_name_prefix="tool"
+            )
+        return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            # forkserver avoids forking the threads of the serving process.
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(_PROCESS_PRELOAD)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS, mp_context=context
+            )
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    global _process_pool
+    with _lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking function on the shared thread pool.
+
+    Args:
+        func: The function to run.
+        *args, **kwargs: Arguments passed to `func`.
+    Returns:
+        The return value of `func`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_thread_pool(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_process(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking function on the shared process pool.
+
+    `func` and its arguments must be picklable, so pass None instead of an ADK
+    ToolContext. If a worker dies, the pool is replaced for the next call.
+
+    Args:
+        func: A module-level function to run.
+        *args, **kwargs: Arguments passed to `func`.
+    Returns:
+        The return value of `func`.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        # submit() starts worker processes on first use, which blocks until the
+        # fork server has imported SymPy. Keep that off the event loop too.
+        future = await loop.run_in_executor(
+            get_thread_pool(), pool.submit, functools.partial(func, *args, **kwargs)
+        )
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        logger.error("Tool process pool broke while running %s", func.__name__)
+        _discard_process_pool(pool)
+        raise
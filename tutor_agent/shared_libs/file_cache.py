@@ -0,0 +1,89 @@
+"""A shared, LRU-bounded read cache for small files.
+
+Each lookup costs one `os.stat`: a file is only read and parsed again when
+its modification time or size changes, and the least recently used entries
+are evicted once `maxsize` files are cached. Parse failures are cached too,
+so a malformed file is not re-parsed on every lookup.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from tutor_agent.shared_libs import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class FileCache:
+    """
+    Caches the parsed contents of files, keyed by path.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, name: str, loader: Callable[[bytes], Any], maxsize: int = 1024):
+        """
+        Args:
+            name: The cache name used in metrics and logs.
+            loader: Parses the raw file contents.
+            maxsize: The maximum number of files kept in memory.
+        """
+        self.name = name
+        self.loader = loader
+        self.maxsize = maxsize
+        # path -> ((mtime_ns, size), value)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[Any]:
+        """
+        Returns the parsed contents of a file.
+
+        Args:
+            path: The file to read.
+        Returns:
+            The loader's result, or None if the file does not exist or could
+            not be parsed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            metrics.CACHE_REQUESTS.labels(self.name, "absent").inc()
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                metrics.CACHE_REQUESTS.labels(self.name, "hit").inc()
+                return entry[1]
+
+        metrics.CACHE_REQUESTS.labels(self.name, "miss" if entry is None else "stale").inc()
+        try:
+            with open(path, "rb") as f:
+                value = self.loader(f.read())
+        except OSError:
+            return None
+        except ValueError as e:
+            logger.warning("Could not parse %s for the %s cache: %s", path, self.name, e)
+            value = None
+
+        with self._lock:
+            self._entries[path] = (version, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,216 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Recording a sample is a dictionary lookup and an addition; nothing is
+formatted until `/metrics` is scraped. Values that already live elsewhere
+(e.g. the tool scheduler's queue depths) are exported through collectors that
+only run at scrape time.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+BYTES_BUCKETS = tuple(256 * 4**i for i in range(9))  # 256 B .. 16 MiB
+
+# (name, type, help, [(labels, value), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        label_str = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{label_str}}} {value:g}"
+    return f"{name} {value:g}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render(self) -> List[str]:
+        return [
+            _format_sample(self.name, dict(zip(self.labelnames, key)), child.value)
+            for key, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """A histogram with fixed, cumulative `le` buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(
+                    _format_sample(f"{self.name}_bucket", {**labels, "le": le}, cumulative)
+                )
+            lines.append(_format_sample(f"{self.name}_sum", labels, child.sum))
+            lines.append(_format_sample(f"{self.name}_count", labels, child.count))
+        return lines
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]):
+    """
+    Registers a function that produces metric families at scrape time.
+
+    Args:
+        collector: A callable returning (name, type, help, samples) tuples.
+    """
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """
+    Renders every registered metric and collector.
+
+    Returns:
+        The metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric._render())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_format_sample(name, labels, value) for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+AGENT_DURATION = Histogram(
+    "tutor_agent_agent_duration_seconds",
+    "Wall time of one agent invocation, including sub-agents and tools.",
+    ["agent"],
+)
+MODEL_DURATION = Histogram(
+    "tutor_agent_model_duration_seconds",
+    "Wall time of one model call.",
+    ["agent"],
+)
+TOOL_DURATION = Histogram(
+    "tutor_agent_tool_duration_seconds",
+    "Wall time of one tool call, including admission wait.",
+    ["tool"],
+)
+PAYLOAD_BYTES = Histogram(
+    "tutor_agent_payload_bytes",
+    "Size of model requests/responses and tool arguments/responses.",
+    ["kind"],
+    buckets=BYTES_BUCKETS,
+)
+TOOL_CALLS = Counter(
+    "tutor_agent_tool_calls_total",
+    "Tool calls by outcome (ok, error or busy).",
+    ["tool", "status"],
+)
+TRANSFERS = Counter(
+    "tutor_agent_transfers_total",
+    "Agent transfers requested by the model.",
+    ["source", "target"],
+)
+MODEL_TOKENS = Counter(
+    "tutor_agent_model_tokens_total",
+    "Tokens reported by the model, by kind (prompt or candidates).",
+    ["agent", "kind"],
+)
+CACHE_REQUESTS = Counter(
+    "tutor_agent_cache_requests_total",
+    "File cache lookups by result (hit, miss, stale or absent).",
+    ["cache", "result"],
+)
+RESPONSE_BYTES = Counter(
+    "tutor_agent_response_bytes_total",
+    "Response body bytes passed through compression, by encoding and stage (uncompressed or compressed).",
+    ["encoding", "stage"],
+)
+FAST_PATH_ANSWERS = Counter(
+    "tutor_agent_fast_path_answers_total",
+    "Student messages answered without a model call, by kind (arithmetic or lookup).",
+    ["agent", "kind"],
+)
@@ -0,0 +1,28 @@
+"""Model selection for the tutor agents."""
+
+import os
+
+from google.adk.models import BaseLlm
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+STAND_IN_MODEL = "stand-in"
+
+# Set TUTOR_AGENT_MODEL=stand-in to run every agent on the scripted offline
+# model (see stand_in_model.py), e.g. for load tests.
+TUTOR_AGENT_MODEL = os.environ.get("TUTOR_AGENT_MODEL", DEFAULT_MODEL)
+
+
+def agent_model(agent_name: str) -> str | BaseLlm:
+    """
+    Returns the model for an agent's `model` slot.
+
+    Args:
+        agent_name: The name of the agent the model is for.
+    Returns:
+        A model name, or a stand-in model instance scripted for `agent_name`.
+    """
+    if TUTOR_AGENT_MODEL == STAND_IN_MODEL:
+        from tutor_agent.shared_libs.stand_in_model import StandInLlm
+
+        return StandInLlm(model=STAND_IN_MODEL, agent_name=agent_name)
+    return TUTOR_AGENT_MODEL
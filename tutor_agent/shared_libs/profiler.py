@@ -0,0 +1,243 @@
+"""On-demand sampling profiler for a live worker.
+
+A background thread walks `sys._current_frames()` at a fixed interval and
+counts each distinct stack. The result is written in the collapsed-stack
+format ("frame;frame;frame count" per line) understood by flamegraph.pl,
+speedscope and inferno.
+
+Nothing runs while the profiler is idle: there is no sampling thread and
+`ProfilingMiddleware` does a single attribute check per request. A profile is
+taken either for a fixed number of seconds or for the next K requests that
+match a path prefix and/or session id. Only this process is sampled; work
+sent to the tool process pool shows up as the thread waiting on it.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from tutor_agent.shared_libs.asgi import buffer_body, session_id_from_body
+
+DEFAULT_INTERVAL = 0.005
+_SITE_PACKAGES = "site-packages" + os.sep
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+class StackSampler:
+    """Samples the stacks of all threads except its own."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Threads told to stop that may still be taking their last sample.
+        self._stopping: List[threading.Thread] = []
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if _SITE_PACKAGES in filename:
+                filename = filename.split(_SITE_PACKAGES, 1)[1]
+            else:
+                filename = os.path.basename(filename)
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self, stop: threading.Event):
+        own_id = threading.get_ident()
+        thread_names = {}
+        while not stop.wait(self.interval):
+            for thread in threading.enumerate():
+                thread_names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                stack.reverse()
+                self.samples[";".join(stack)] += 1
+
+    def start(self):
+        """Starts sampling; after stop() it resumes adding to the same samples."""
+        # A fresh event per run, so a restart cannot revive a stopping thread.
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Tells the sampling thread to stop, without waiting; safe on the event loop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._stopping.append(self._thread)
+            self._thread = None
+
+    async def join(self):
+        """Waits, off the event loop, for stopped threads to finish their last sample."""
+        while self._stopping:
+            await asyncio.to_thread(self._stopping.pop().join)
+
+    def collapsed(self) -> str:
+        """Returns the samples in the collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+@dataclass
+class _RequestProfile:
+    """The state of a profile bounded by a number of matching requests."""
+
+    sampler: StackSampler
+    count: int
+    path_prefix: str
+    session_id: str
+    done: asyncio.Future
+    active: int = 0
+    finished: int = 0
+
+    def matches_path(self, path: str) -> bool:
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        return True
+
+
+class Profiler:
+    """Coordinates at most one profile at a time for this process."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        # Read on every request by ProfilingMiddleware; None while idle.
+        self.request_profile: Optional[_RequestProfile] = None
+
+    async def profile_for(self, seconds: float, interval: float = DEFAULT_INTERVAL) -> str:
+        """
+        Samples every thread for a fixed duration.
+
+        Args:
+            seconds: How long to sample.
+            interval: Seconds between samples.
+        Returns:
+            The collapsed stacks.
+        Raises:
+            ProfilerBusyError: If another profile is running.
+        """
+        if self._lock.locked():
+            raise ProfilerBusyError("A profile is already running")
+        async with self._lock:
+            sampler = StackSampler(interval)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+                await sampler.join()
+            return sampler.collapsed()
+
+    async def profile_requests(
+        self,
+        count: int,
+        path_prefix: str = "",
+        session_id: str = "",
+        timeout: float = 60.0,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> str:
+        """
+        Samples every thread while one of the next `count` matching requests
+        is in flight.
+
+        Args:
+            count: Number of matching requests to profile.
+            path_prefix: Only requests whose path starts with this match.
+            session_id: Only requests for this session match. The id is looked
+                up in the path and, for POST requests, in the JSON body.
+            timeout: Give up (and return what was collected) after this long.
+            interval: Seconds between samples.
+        Returns:
+            The collapsed stacks.
+        Raises:
+            ProfilerBusyError: If another profile is running.
+        """
+        if self._lock.locked():
+            raise ProfilerBusyError("A profile is already running")
+        async with self._lock:
+            profile = _RequestProfile(
+                sampler=StackSampler(interval),
+                count=count,
+                path_prefix=path_prefix,
+                session_id=session_id,
+                done=asyncio.get_running_loop().create_future(),
+            )
+            self.request_profile = profile
+            try:
+                await asyncio.wait_for(asyncio.shield(profile.done), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.request_profile = None
+                profile.sampler.stop()
+                await profile.sampler.join()
+            return profile.sampler.collapsed()
+
+    def _request_started(self, profile: _RequestProfile):
+        if profile.active == 0:
+            profile.sampler.start()
+        profile.active += 1
+
+    def _request_finished(self, profile: _RequestProfile):
+        profile.active -= 1
+        profile.finished += 1
+        if profile.active == 0:
+            profile.sampler.stop()
+        if profile.finished >= profile.count and not profile.done.done():
+            profile.done.set_result(None)
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that starts and stops request-bounded profiles.
+
+    While no request profile is armed it only forwards the call.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        profile = profiler.request_profile
+        if profile is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not profile.matches_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if profile.session_id and profile.session_id not in scope["path"]:
+            receive, body = await buffer_body(receive)
+            if session_id_from_body(body) != profile.session_id:
+                await self.app(scope, receive, send)
+                return
+        if profile.finished + profile.active >= profile.count:
+            await self.app(scope, receive, send)
+            return
+
+        profiler._request_started(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler._request_finished(profile)
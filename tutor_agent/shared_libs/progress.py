@@ -0,0 +1,241 @@
+"""Progress events from long-running tools, merged into `/run_sse` streams.
+
+ADK only emits an event once a tool call returns, so a slow tool leaves the
+event stream silent. Tools report intermediate stages through a
+`ProgressReporter`. The reports go to an in-process bus keyed by session id,
+and `ProgressStreamMiddleware` interleaves them with the ADK events of the
+`/run_sse` responses of that session.
+
+Clients opt in with `POST /run_sse?progress=1`. Progress frames are sent as
+`event: progress` and carry an Event-shaped JSON object without `content`:
+
+    {"id": ..., "invocationId": ..., "author": "math_agent", "timestamp": ...,
+     "partial": true,
+     "progress": {"tool": "plotting_tool", "functionCallId": ..., "stage": "trace_done", ...}}
+
+Every `/run_sse` stream, opted in or not, also gets an SSE comment heartbeat
+while it is otherwise idle, so clients and proxies do not time out.
+
+Reporting is a no-op unless a client is subscribed to the session, so tools
+only build partial results when someone will receive them.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+from google.adk.tools import ToolContext
+
+from tutor_agent.shared_libs.asgi import buffer_body, session_id_from_body
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_FRAMES = 256
+# Interval of "running" reports from tools that cannot report finer stages.
+TOOL_HEARTBEAT_INTERVAL = 2.0
+DEFAULT_STREAM_HEARTBEAT = 15.0
+
+
+class Subscription:
+    """The frames waiting to be written to one stream."""
+
+    def __init__(self):
+        self.frames: Deque[bytes] = deque()
+        self.ready = asyncio.Event()
+
+    def take(self) -> List[bytes]:
+        frames = list(self.frames)
+        self.frames.clear()
+        self.ready.clear()
+        return frames
+
+
+class ProgressBus:
+    """Fans progress frames out to the streams subscribed to a session."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return bool(self._subscribers.get(session_id))
+
+    def subscribe(self, session_id: str) -> Subscription:
+        """Must be called on the event loop; pair it with unsubscribe()."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription()
+        self._subscribers.setdefault(session_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, session_id: str, subscription: Subscription):
+        subscriptions = self._subscribers.get(session_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[session_id]
+
+    def _deliver(self, session_id: str, frame: bytes):
+        for subscription in list(self._subscribers.get(session_id, ())):
+            if len(subscription.frames) >= MAX_PENDING_FRAMES:
+                logger.debug("Dropping a progress frame for session %s", session_id)
+                continue
+            subscription.frames.append(frame)
+            subscription.ready.set()
+
+    def publish(self, session_id: str, frame: bytes):
+        """
+        Sends a frame to every stream of a session. Safe to call from any
+        thread, e.g. from a tool running on the thread pool.
+        """
+        if not self.has_subscribers(session_id) or self._loop is None:
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(session_id, frame)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, session_id, frame)
+
+
+progress_bus = ProgressBus()
+
+
+class ProgressReporter:
+    """Reports the stages of one tool call."""
+
+    def __init__(self, tool_name: str, tool_context: Optional[ToolContext]):
+        self.tool_name = tool_name
+        self.session_id = None
+        if tool_context is not None:
+            self.session_id = tool_context._invocation_context.session.id
+            self.invocation_id = tool_context.invocation_id
+            self.author = tool_context.agent_name
+            self.function_call_id = tool_context.function_call_id
+
+    @property
+    def enabled(self) -> bool:
+        """Whether anyone receives the reports; check it before building payloads."""
+        return self.session_id is not None and progress_bus.has_subscribers(self.session_id)
+
+    def report(self, stage: str, **data: Any):
+        """
+        Publishes one stage of the tool call.
+
+        Args:
+            stage: The stage name, e.g. "started", "trace_done" or "completed".
+            **data: JSON-serializable details of the stage.
+        """
+        if not self.enabled:
+            return
+        frame = {
+            "id": uuid.uuid4().hex,
+            "invocationId": self.invocation_id,
+            "author": self.author,
+            "timestamp": time.time(),
+            "partial": True,
+            "progress": {
+                "tool": self.tool_name,
+                "functionCallId": self.function_call_id,
+                "stage": stage,
+                **data,
+            },
+        }
+        payload = json.dumps(frame, default=str, separators=(",", ":"))
+        progress_bus.publish(self.session_id, f"event: progress\ndata: {payload}\n\n".encode())
+
+
+async def with_heartbeat(awaitable: Awaitable, reporter: ProgressReporter, interval: float = TOOL_HEARTBEAT_INTERVAL):
+    """
+    Awaits work that cannot report its own stages (e.g. on the process
+    pool), reporting "running" with the elapsed time every `interval` seconds.
+    """
+    task = asyncio.ensure_future(awaitable)
+    if not reporter.enabled:
+        return await task
+    started = time.perf_counter()
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=interval)
+        if done:
+            return task.result()
+        reporter.report("running", elapsed_seconds=round(time.perf_counter() - started, 1))
+
+
+class ProgressStreamMiddleware:
+    """
+    ASGI middleware that adds progress frames and heartbeats to `/run_sse`.
+
+    Frames are only written between ADK events: ADK sends each event as one
+    body chunk, and every write goes through the same lock.
+    """
+
+    def __init__(self, app, path: str = "/run_sse", heartbeat_interval: float = DEFAULT_STREAM_HEARTBEAT):
+        self.app = app
+        self.path = path
+        self.heartbeat_interval = heartbeat_interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        session_id = None
+        query = parse_qs(scope.get("query_string", b"").decode())
+        if query.get("progress", [""])[0].lower() in ("1", "true"):
+            receive, body = await buffer_body(receive)
+            session_id = session_id_from_body(body)
+        subscription = progress_bus.subscribe(session_id) if session_id else Subscription()
+
+        lock = asyncio.Lock()
+        state = {"streaming": False, "finished": False, "last_write": time.monotonic()}
+
+        async def write(frames: List[bytes]):
+            for frame in frames:
+                if state["streaming"]:
+                    await send({"type": "http.response.body", "body": frame, "more_body": True})
+
+        async def wrapped_send(message):
+            async with lock:
+                if message["type"] == "http.response.start":
+                    headers = dict(message.get("headers", []))
+                    state["streaming"] = message["status"] == 200 and headers.get(
+                        b"content-type", b""
+                    ).startswith(b"text/event-stream")
+                elif message["type"] == "http.response.body":
+                    # Frames reported before this event was produced go first.
+                    await write(subscription.take())
+                    state["finished"] = not message.get("more_body", False)
+                await send(message)
+                state["last_write"] = time.monotonic()
+
+        async def pump():
+            while True:
+                idle = time.monotonic() - state["last_write"]
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), max(0.0, self.heartbeat_interval - idle))
+                except asyncio.TimeoutError:
+                    pass
+                async with lock:
+                    if state["finished"]:
+                        return
+                    frames = subscription.take()
+                    if not frames:
+                        if time.monotonic() - state["last_write"] < self.heartbeat_interval:
+                            continue
+                        frames = [b": heartbeat\n\n"]
+                    await write(frames)
+                    state["last_write"] = time.monotonic()
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            pump_task.cancel()
+            if session_id:
+                progress_bus.unsubscribe(session_id, subscription)
@@ -0,0 +1,369 @@
+"""Admission control for tool execution.
+
+Every tool registered on a sub-agent is wrapped with `scheduled`, which routes
+each call through a process-wide `ToolScheduler`. The scheduler bounds how many
+calls of each tool may run at once, how many may wait behind them and for how
+long. Tools are split into lanes: cheap lookups run in the interactive lane and
+never compete with SymPy, NumPy or schemdraw work in the heavy lane. A caller
+that cannot be admitted gets a "busy" tool response instead of waiting forever.
+Admitted calls of sync tools run on a thread pool of their lane with one
+thread per lane slot, so they do not block the event loop, never wait for a
+thread once admitted and never wait behind work from another lane.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from google.adk.tools import FunctionTool, ToolContext
+from google.genai import types
+from typing_extensions import override
+
+from tutor_agent.shared_libs import metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_LANE = "interactive"
+HEAVY_LANE = "heavy"
+
+
+@dataclass(frozen=True)
+class ToolLimit:
+    """
+    Scheduling limits for a single tool.
+
+    Attributes:
+        lane: The lane the tool runs in (INTERACTIVE_LANE or HEAVY_LANE).
+        max_concurrency: Maximum number of calls of this tool running at once.
+        max_queue: Maximum number of calls allowed to wait for a slot.
+        queue_timeout: Seconds a call may wait for a slot before giving up.
+    """
+
+    lane: str
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+
+
+# Total number of concurrently running calls per lane, across all tools.
+LANE_CONCURRENCY = {
+    INTERACTIVE_LANE: 32,
+    HEAVY_LANE: 4,
+}
+
+TOOL_LIMITS = {
+    "calculator_tool": ToolLimit(INTERACTIVE_LANE, 16, 64, 1.0),
+    "formula_lookup_tool": ToolLimit(INTERACTIVE_LANE, 16, 64, 1.0),
+    "unit_calculator_tool": ToolLimit(INTERACTIVE_LANE, 16, 64, 1.0),
+    "unit_conversion_tool": ToolLimit(INTERACTIVE_LANE, 16, 64, 1.0),
+    "symbolic_math_tool": ToolLimit(HEAVY_LANE, 2, 8, 10.0),
+    "plotting_tool": ToolLimit(HEAVY_LANE, 2, 8, 10.0),
+    "circuit_visualization_tool": ToolLimit(HEAVY_LANE, 2, 8, 10.0),
+}
+
+DEFAULT_TOOL_LIMIT = ToolLimit(HEAVY_LANE, 2, 8, 10.0)
+
+
+class ToolBusyError(Exception):
+    """Raised when a tool call cannot be admitted."""
+
+    def __init__(self, tool_name: str, reason: str, retry_after: float):
+        super().__init__(f"{tool_name} is busy ({reason})")
+        self.tool_name = tool_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _ToolStats:
+    """Counters for one tool, reported through `ToolScheduler.snapshot`."""
+
+    __slots__ = (
+        "running",
+        "queued",
+        "max_queued",
+        "admitted",
+        "rejected",
+        "timed_out",
+        "wait_seconds_total",
+        "wait_seconds_max",
+    )
+
+    def __init__(self):
+        self.running = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(
+                self.wait_seconds_total / self.admitted, 6
+            )
+            if self.admitted
+            else 0.0,
+        }
+
+
+class ToolScheduler:
+    """
+    Per-tool and per-lane admission control.
+
+    A call first takes a slot of its own tool, then a slot of its lane. Both
+    waits share one deadline (the tool's queue_timeout). The scheduler is
+    bound to the event loop that serves the app; all bookkeeping happens on
+    that loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        tool_limits: Dict[str, ToolLimit] = TOOL_LIMITS,
+        lane_concurrency: Dict[str, int] = LANE_CONCURRENCY,
+    ):
+        self._tool_limits = dict(tool_limits)
+        self._lane_concurrency = dict(lane_concurrency)
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lane_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lane_in_use: Dict[str, int] = {}
+        self._lane_pools: Dict[str, ThreadPoolExecutor] = {}
+        self._stats: Dict[str, _ToolStats] = {}
+
+    def limit_for(self, tool_name: str) -> ToolLimit:
+        return self._tool_limits.get(tool_name, DEFAULT_TOOL_LIMIT)
+
+    def _tool_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        if tool_name not in self._tool_semaphores:
+            limit = self.limit_for(tool_name)
+            self._tool_semaphores[tool_name] = asyncio.Semaphore(
+                limit.max_concurrency
+            )
+        return self._tool_semaphores[tool_name]
+
+    def _lane_semaphore(self, lane: str) -> asyncio.Semaphore:
+        if lane not in self._lane_semaphores:
+            self._lane_semaphores[lane] = asyncio.Semaphore(
+                self._lane_concurrency.get(lane, 1)
+            )
+        return self._lane_semaphores[lane]
+
+    def _lane_pool(self, lane: str) -> ThreadPoolExecutor:
+        if lane not in self._lane_pools:
+            self._lane_pools[lane] = ThreadPoolExecutor(
+                max_workers=self._lane_concurrency.get(lane, 1),
+                thread_name_prefix=f"{lane}-tool",
+            )
+        return self._lane_pools[lane]
+
+    def _tool_stats(self, tool_name: str) -> _ToolStats:
+        if tool_name not in self._stats:
+            self._stats[tool_name] = _ToolStats()
+        return self._stats[tool_name]
+
+    @asynccontextmanager
+    async def admit(self, tool_name: str):
+        """
+        Holds a tool slot and a lane slot for the duration of the block.
+
+        Args:
+            tool_name: The name of the tool being called.
+        Raises:
+            ToolBusyError: If the queue is full or the wait timed out.
+        """
+        limit = self.limit_for(tool_name)
+        stats = self._tool_stats(tool_name)
+        tool_semaphore = self._tool_semaphore(tool_name)
+        lane_semaphore = self._lane_semaphore(limit.lane)
+
+        if stats.queued >= limit.max_queue:
+            stats.rejected += 1
+            logger.warning(
+                "Rejected %s: %d calls already queued", tool_name, stats.queued
+            )
+            raise ToolBusyError(tool_name, "queue full", limit.queue_timeout)
+
+        start = time.perf_counter()
+        deadline = start + limit.queue_timeout
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        acquired = []
+        try:
+            for semaphore in (tool_semaphore, lane_semaphore):
+                if semaphore.locked():
+                    remaining = max(deadline - time.perf_counter(), 0)
+                    await asyncio.wait_for(semaphore.acquire(), remaining)
+                else:
+                    await semaphore.acquire()
+                acquired.append(semaphore)
+        except asyncio.TimeoutError:
+            for semaphore in acquired:
+                semaphore.release()
+            stats.timed_out += 1
+            logger.warning(
+                "Timed out waiting %.2fs for %s", limit.queue_timeout, tool_name
+            )
+            raise ToolBusyError(tool_name, "queue timeout", limit.queue_timeout)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            stats.queued -= 1
+
+        waited = time.perf_counter() - start
+        stats.admitted += 1
+        stats.wait_seconds_total += waited
+        stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+        stats.running += 1
+        self._lane_in_use[limit.lane] = self._lane_in_use.get(limit.lane, 0) + 1
+        try:
+            yield
+        finally:
+            stats.running -= 1
+            self._lane_in_use[limit.lane] -= 1
+            lane_semaphore.release()
+            tool_semaphore.release()
+
+    async def run_in_lane(self, tool_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking call of an admitted tool on its lane's thread pool.
+
+        The pool has as many threads as the lane has slots, so a call admitted
+        by `admit` starts at once and is running when the stats say so.
+
+        Args:
+            tool_name: The name of the tool being called.
+            func: The blocking function to run.
+            *args, **kwargs: Arguments passed to `func`.
+        Returns:
+            The return value of `func`.
+        """
+        pool = self._lane_pool(self.limit_for(tool_name).lane)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Reports current queue depths and wait times.
+
+        Returns:
+            A dictionary with per-tool counters and per-lane capacity.
+        """
+        lanes = {
+            lane: {"capacity": capacity, "in_use": self._lane_in_use.get(lane, 0)}
+            for lane, capacity in self._lane_concurrency.items()
+        }
+        return {
+            "lanes": lanes,
+            "tools": {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
+
+    def collect(self) -> List[metrics.MetricFamily]:
+        """Exports the scheduler counters as metric families at scrape time."""
+        families = [
+            ("tutor_agent_tool_queue_depth", "gauge", "Tool calls waiting for a slot.", "queued"),
+            ("tutor_agent_tool_running", "gauge", "Tool calls currently running.", "running"),
+            ("tutor_agent_tool_admitted_total", "counter", "Tool calls admitted.", "admitted"),
+            ("tutor_agent_tool_rejected_total", "counter", "Tool calls rejected because the queue was full.", "rejected"),
+            ("tutor_agent_tool_timed_out_total", "counter", "Tool calls that timed out waiting for a slot.", "timed_out"),
+            ("tutor_agent_tool_queue_wait_seconds_total", "counter", "Total time admitted tool calls spent waiting.", "wait_seconds_total"),
+            ("tutor_agent_tool_queue_wait_seconds_max", "gauge", "Longest time a tool call waited for a slot.", "wait_seconds_max"),
+        ]
+        result = [
+            (
+                name,
+                kind,
+                documentation,
+                [({"tool": tool}, getattr(stats, attr)) for tool, stats in self._stats.items()],
+            )
+            for name, kind, documentation, attr in families
+        ]
+        result.append(
+            (
+                "tutor_agent_lane_in_use",
+                "gauge",
+                "Running tool calls per lane.",
+                [({"lane": lane}, self._lane_in_use.get(lane, 0)) for lane in self._lane_concurrency],
+            )
+        )
+        return result
+
+
+tool_scheduler = ToolScheduler()
+metrics.register_collector(tool_scheduler.collect)
+
+
+class ScheduledTool(FunctionTool):
+    """
+    A FunctionTool whose calls go through `tool_scheduler`.
+
+    The function declaration the model sees is the one of the wrapped
+    function, so registering a tool through `scheduled` is transparent to the
+    prompts.
+    """
+
+    @override
+    def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
+        declaration = super()._get_declaration()
+        # ADK rebuilds the declared function from its code object, which drops
+        # a docstring copied over by functools.wraps.
+        if declaration is not None and not declaration.description:
+            declaration.description = self.description
+        return declaration
+
+    async def _run_sync_in_thread(
+        self, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        # Same argument handling as FunctionTool.run_async, which would call
+        # the function on the event loop.
+        args_to_call = args.copy()
+        if "tool_context" in inspect.signature(self.func).parameters:
+            args_to_call["tool_context"] = tool_context
+        missing = [arg for arg in self._get_mandatory_args() if arg not in args_to_call]
+        if missing:
+            return await super().run_async(args=args, tool_context=tool_context)
+        return await tool_scheduler.run_in_lane(self.name, self.func, **args_to_call) or {}
+
+    @override
+    async def run_async(
+        self, *, args: Dict[str, Any], tool_context: ToolContext
+    ) -> Any:
+        try:
+            async with tool_scheduler.admit(self.name):
+                if inspect.iscoroutinefunction(self.func):
+                    return await super().run_async(args=args, tool_context=tool_context)
+                return await self._run_sync_in_thread(args, tool_context)
+        except ToolBusyError as e:
+            return {
+                "error": "busy",
+                "detail": f"{e.tool_name} is handling too many requests ({e.reason}). Try again shortly.",
+                "retry_after": e.retry_after,
+            }
+
+
+def scheduled(func: Callable[..., Any]) -> ScheduledTool:
+    """
+    Wraps a tool function so that every call goes through `tool_scheduler`.
+
+    Args:
+        func: The tool function to wrap (sync or async).
+    Returns:
+        A tool to register on an agent in place of `func`.
+    """
+    return ScheduledTool(func)
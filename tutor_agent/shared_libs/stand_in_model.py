@@ -0,0 +1,174 @@
+"""A scripted, offline stand-in for Gemini.
+
+The stand-in replays transfers, function calls and text replies from a JSON
+script with configurable latency, so the full request path (HTTP, runner,
+agents, callbacks and tools) can be load-tested without network access or
+model quota. One instance is created per agent, because an LlmRequest does not
+say which agent issued it.
+
+Script format (STAND_IN_SCRIPT, default loadtest/scenarios.json):
+    {
+      "default_latency_ms": 300,
+      "latency_jitter_ms": 50,
+      "scenarios": [
+        {
+          "name": "integral",
+          "match": "integrat",            # regex searched in the student message
+          "message": "Integrate x*sin(x)", # used by the load generator
+          "agents": {
+            "root_agent": [{"transfer": "math_agent"}],
+            "math_agent": [
+              {"function_calls": [{"name": "symbolic_math_tool", "args": {...}}]},
+              {"text": "...", "latency_ms": 500}
+            ]
+          }
+        }
+      ]
+    }
+
+Each agent's list is replayed one step per model call within a turn. The
+first scenario whose `match` is found in the student's message is used, so
+put a catch-all scenario (empty `match`) last.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from typing_extensions import override
+
+DEFAULT_SCRIPT_PATH = Path(__file__).resolve().parents[2] / "loadtest" / "scenarios.json"
+STAND_IN_SCRIPT = os.environ.get("STAND_IN_SCRIPT", str(DEFAULT_SCRIPT_PATH))
+
+# ADK replays other agents' turns to a sub-agent as user messages with this
+# prefix; they are not the student's message.
+_CONTEXT_PREFIX = "For context:"
+
+
+@lru_cache(maxsize=8)
+def load_script(path: str) -> Dict[str, Any]:
+    """Loads and compiles a stand-in script once per path."""
+    with open(path, encoding="utf-8") as f:
+        script = json.load(f)
+    for scenario in script["scenarios"]:
+        scenario["_pattern"] = re.compile(scenario.get("match", ""), re.IGNORECASE)
+    return script
+
+
+def _student_message_index(contents: List[types.Content]) -> int:
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role != "user":
+            continue
+        texts = [part.text for part in content.parts or [] if part.text]
+        if texts and not texts[0].startswith(_CONTEXT_PREFIX):
+            return index
+    return -1
+
+
+def _context_index(contents: List[types.Content]) -> int:
+    """The last user text of any kind, i.e. where this agent's turn began."""
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == "user" and any(part.text for part in content.parts or []):
+            return index
+    return -1
+
+
+class StandInLlm(BaseLlm):
+    """
+    A BaseLlm that replays a script instead of calling a model.
+
+    Attributes:
+        agent_name: The agent whose steps this instance replays.
+        script_path: The JSON script to replay.
+    """
+
+    agent_name: str = ""
+    script_path: str = STAND_IN_SCRIPT
+
+    @classmethod
+    @override
+    def supported_models(cls) -> list[str]:
+        return [r"stand-in(/.*)?"]
+
+    def _step(self, llm_request: LlmRequest) -> Dict[str, Any]:
+        script = load_script(self.script_path)
+        contents = llm_request.contents or []
+
+        student_index = _student_message_index(contents)
+        message = ""
+        if student_index >= 0:
+            message = " ".join(
+                part.text for part in contents[student_index].parts if part.text
+            )
+        scenario = next(
+            (s for s in script["scenarios"] if s["_pattern"].search(message)), None
+        )
+        if scenario is None:
+            return {"text": "(stand-in) No scenario matched this message."}
+
+        # One step per model call already made in this turn.
+        turn_start = _context_index(contents)
+        step_index = sum(
+            1 for content in contents[turn_start + 1 :] if content.role == "model"
+        )
+        steps = scenario.get("agents", {}).get(self.agent_name, [])
+        if step_index < len(steps):
+            return steps[step_index]
+        return {"text": f"(stand-in) {self.agent_name} has no more scripted steps."}
+
+    def _latency(self, step: Dict[str, Any]) -> float:
+        script = load_script(self.script_path)
+        latency_ms = step.get("latency_ms", script.get("default_latency_ms", 0))
+        jitter_ms = script.get("latency_jitter_ms", 0)
+        if jitter_ms:
+            latency_ms = max(0, latency_ms + random.uniform(-jitter_ms, jitter_ms))
+        return latency_ms / 1000
+
+    @override
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        step = self._step(llm_request)
+        await asyncio.sleep(self._latency(step))
+
+        parts = []
+        if "transfer" in step:
+            parts.append(
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="transfer_to_agent", args={"agent_name": step["transfer"]}
+                    )
+                )
+            )
+        for call in step.get("function_calls", []):
+            parts.append(
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name=call["name"], args=call.get("args", {})
+                    )
+                )
+            )
+        if "text" in step:
+            parts.append(types.Part(text=step["text"]))
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=sum(
+                    len(part.text or "")
+                    for content in llm_request.contents or []
+                    for part in content.parts or []
+                )
+                // 4,
+                candidates_token_count=len(step.get("text", "")) // 4,
+            ),
+        )
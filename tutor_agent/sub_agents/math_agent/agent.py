@@ -1,22 +1,42 @@
 from google.adk.agents import Agent
 from tutor_agent.sub_agents.math_agent import prompt
 
+from tutor_agent.shared_libs.models import agent_model
+from tutor_agent.shared_libs.scheduling import scheduled
+from tutor_agent.tools.fast_path import answer_directly
+from tutor_agent.tools.memory import _load_precreated_itinerary
+from tutor_agent.tools.parallel import dispatch_tool_calls
+from tutor_agent.tools.tracing import (
+    trace_agent_end,
+    trace_agent_start,
+    trace_model_end,
+    trace_model_start,
+    trace_tool_end,
+    trace_tool_start,
+)
+
 # Import tool definitions
 from tutor_agent.tools.calculator import calculator_tool
 from tutor_agent.tools.formula_lookup import formula_lookup_tool
-from tutor_agent.tools.symbolic_math import symbolic_math_tool
-from tutor_agent.tools.plotting import plotting_tool
+from tutor_agent.tools.symbolic_math import symbolic_math_tool_async
+from tutor_agent.tools.plotting import plotting_tool_async
 
 math_agent = Agent(
-    model="gemini-2.0-flash",
+    model=agent_model("math_agent"),
     name="math_agent",
     description="Handles mathematics-related questions and problems.",
     instruction=prompt.MATH_AGENT_INSTR,
     tools=[
-        calculator_tool,
-        formula_lookup_tool,
-        symbolic_math_tool,
-        plotting_tool,
+        scheduled(calculator_tool),
+        scheduled(formula_lookup_tool),
+        scheduled(symbolic_math_tool_async),
+        scheduled(plotting_tool_async),
     ],
+    before_agent_callback=[trace_agent_start, _load_precreated_itinerary, answer_directly],
+    after_agent_callback=trace_agent_end,
+    before_model_callback=trace_model_start,
+    after_model_callback=trace_model_end,
+    before_tool_callback=[trace_tool_start, dispatch_tool_calls],
+    after_tool_callback=trace_tool_end,
     # output_schema=... (if you expect structured math output)
 )
@@ -1,6 +1,10 @@
 from google.adk.tools import ToolContext
 from typing import List, Dict, Any
 import base64
+import functools
+
+from tutor_agent.shared_libs.executors import run_in_process
+from tutor_agent.shared_libs.progress import ProgressReporter, with_heartbeat
 
 try:
     import schemdraw
@@ -335,6 +339,33 @@ def circuit_visualization_tool(
         return {"error": "Failed to generate circuit diagram", "detail": str(e)}
 
 
+
+@functools.wraps(circuit_visualization_tool)
+async def circuit_visualization_tool_async(
+    components: List[Dict[str, Any]],
+    tool_context: ToolContext,
+    title: str = "Circuit Diagram",
+    show_labels: bool = True,
+    grid: bool = False,
+) -> dict:
+    # schemdraw layout is pure Python, so it runs in a worker process. The
+    # ToolContext is not picklable and the sync tool does not use it, so the
+    # worker cannot report stages; only start, heartbeats and the end are sent.
+    progress = ProgressReporter("circuit_visualization_tool", tool_context)
+    progress.report("started", components=len(components))
+    try:
+        result = await with_heartbeat(
+            run_in_process(
+                circuit_visualization_tool, components, None, title, show_labels, grid
+            ),
+            progress,
+        )
+    except Exception as e:
+        result = {"error": "Failed to generate circuit diagram", "detail": str(e)}
+    progress.report("failed" if "error" in result else "completed")
+    return result
+
+
 # Example usage function for testing
 def create_example_circuit():
     """Example of how to use the circuit visualization tool"""
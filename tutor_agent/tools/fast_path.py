@@ -0,0 +1,243 @@
+"""Answers to trivial questions without a model call.
+
+Messages that are nothing but an arithmetic expression ("What is 12*7.5?") or
+a request for a known formula or constant ("What is the speed of light?")
+need no model: `answer_directly` computes the answer with `calculator_tool` or
+`formula_lookup_tool` and returns it as the agent's reply. ADK records the
+reply in the session like any other agent response and ends the invocation,
+which saves the transfer, the tool call and the model turns around them.
+
+Only exact matches are answered. Anything else, including expressions with
+variables or function calls and formulas that are only mentioned by name,
+goes to the model as usual. Sub-agents only answer lookups asked as a
+question: later turns of a session go straight to the last sub-agent, where a
+bare "3*4" is more likely the student's own working than a question. Set
+TUTOR_AGENT_FAST_PATH=0 to turn it off.
+
+Register it after the state callbacks of every agent a session can talk to:
+    before_agent_callback=[trace_agent_start, _load_precreated_itinerary, answer_directly]
+"""
+
+import ast
+import logging
+import math
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from tutor_agent.shared_libs import metrics
+from tutor_agent.tools.calculator import calculator_tool
+from tutor_agent.tools.formula_lookup import FORMULA_DATABASE, formula_lookup_tool
+from tutor_agent.tools.tracing import trace_agent_end
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_ENABLED = os.environ.get("TUTOR_AGENT_FAST_PATH", "1").lower() not in ("0", "false")
+
+MAX_EXPRESSION_LENGTH = 200
+# Keeps "9^9^9" and the like off the event loop.
+MAX_EXPONENT = 100
+
+_ARITHMETIC_PREFIX = re.compile(
+    r"^(?:what\s+is|what's|whats|how\s+much\s+is|calculate|compute|evaluate)\s+", re.IGNORECASE
+)
+_ARITHMETIC = re.compile(r"^[\d\s.+\-*/^()×÷]+$")
+_LOOKUP_PREFIX = re.compile(
+    r"^(?:(?:what\s+is|whats|give\s+me|tell\s+me|show\s+me|state)\s+)?(?:the\s+)?"
+    r"(?:(?P<kind>formula|equation|value)\s+(?:for|of)\s+(?:the\s+)?)?"
+)
+_LOOKUP_SUFFIX = re.compile(r"\s+(?:formula|equation)$")
+_TRAILING_PUNCTUATION = " \t\n?.!="
+
+# LaTeX of the FORMULA_DATABASE entries that can be answered directly. Kept
+# here so that formula_lookup_tool responses to the model stay small.
+_LOOKUP_LATEX = {
+    "area of circle": r"A = \pi r^2",
+    "pythagorean theorem": r"a^2 + b^2 = c^2",
+    "quadratic formula": r"x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}",
+    "newton's second law": r"F = m a",
+    "kinetic energy": r"KE = \frac{1}{2} m v^2",
+    "speed of light": r"c = 299\,792\,458 \ \text{m/s}",
+    "planck's constant": r"h = 6.62607015 \times 10^{-34} \ \text{J} \cdot \text{s}",
+}
+
+_PRECEDENCE = {ast.Add: 1, ast.Sub: 1, ast.Mult: 2, ast.Div: 2, ast.Pow: 4}
+_UNARY_PRECEDENCE = 3
+
+
+def _message_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    if content is None or content.role != "user" or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text).strip()
+
+
+def _check_arithmetic(node: ast.AST):
+    """Raises ValueError unless `node` is plain arithmetic on number literals."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        _check_arithmetic(node.operand)
+        return
+    if isinstance(node, ast.BinOp) and type(node.op) in _PRECEDENCE:
+        if isinstance(node.op, ast.Pow):
+            exponent = node.right.operand if isinstance(node.right, ast.UnaryOp) else node.right
+            if not isinstance(exponent, ast.Constant) or abs(exponent.value) > MAX_EXPONENT:
+                raise ValueError("exponent too large")
+            if any(isinstance(n, ast.BinOp) and isinstance(n.op, ast.Pow) for n in ast.walk(node.left)):
+                raise ValueError("nested powers")
+        _check_arithmetic(node.left)
+        _check_arithmetic(node.right)
+        return
+    raise ValueError(f"unsupported syntax: {ast.dump(node)}")
+
+
+def _to_latex(node: ast.AST, source: str) -> Tuple[str, int]:
+    """Renders an arithmetic AST as LaTeX, with its precedence."""
+    if isinstance(node, ast.Constant):
+        return ast.get_source_segment(source, node), 5
+    if isinstance(node, ast.UnaryOp):
+        operand, precedence = _to_latex(node.operand, source)
+        if precedence < _UNARY_PRECEDENCE:
+            operand = rf"\left({operand}\right)"
+        return ("-" if isinstance(node.op, ast.USub) else "+") + operand, _UNARY_PRECEDENCE
+
+    precedence = _PRECEDENCE[type(node.op)]
+    left, left_precedence = _to_latex(node.left, source)
+    right, right_precedence = _to_latex(node.right, source)
+    if isinstance(node.op, ast.Div):
+        return rf"\frac{{{left}}}{{{right}}}", 5
+    if isinstance(node.op, ast.Pow):
+        if left_precedence < 5:
+            left = rf"\left({left}\right)"
+        return f"{left}^{{{right}}}", precedence
+    if left_precedence < precedence:
+        left = rf"\left({left}\right)"
+    # a - (b + c) and a × (b × c) keep their parentheses; a + (b + c) need not.
+    if right_precedence < precedence or (
+        right_precedence == precedence and not isinstance(node.op, ast.Add)
+    ):
+        right = rf"\left({right}\right)"
+    symbol = {ast.Add: "+", ast.Sub: "-", ast.Mult: r"\times"}[type(node.op)]
+    return f"{left} {symbol} {right}", precedence
+
+
+def _format_number(value) -> Tuple[str, bool]:
+    """Formats a result as LaTeX; the flag is False when it was rounded."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        value = int(value)
+    if isinstance(value, int):
+        if abs(value) < 10**15:
+            return str(value), True
+        value = float(value)
+    text = f"{value:.10g}"
+    exact = float(text) == value
+    if "e" in text:
+        mantissa, exponent = text.split("e")
+        text = rf"{mantissa} \times 10^{{{int(exponent)}}}"
+    return text, exact
+
+
+def _answer_arithmetic(message: str) -> Optional[str]:
+    expression = _ARITHMETIC_PREFIX.sub("", message).rstrip(_TRAILING_PUNCTUATION)
+    if len(expression) > MAX_EXPRESSION_LENGTH or not _ARITHMETIC.match(expression):
+        return None
+    expression = expression.replace("^", "**").replace("×", "*").replace("÷", "/")
+    try:
+        tree = ast.parse(expression, mode="eval")
+        _check_arithmetic(tree.body)
+    except (SyntaxError, ValueError):
+        return None
+    # A bare number is not a question.
+    if not any(isinstance(node, ast.BinOp) for node in ast.walk(tree)):
+        return None
+
+    response = calculator_tool(expression, tool_context=None)
+    result = response.get("result")
+    if "error" in response or not isinstance(result, (int, float)):
+        return None
+    if isinstance(result, float) and not math.isfinite(result):
+        return None
+    try:
+        number, exact = _format_number(result)
+    except OverflowError:
+        return None
+    latex, _ = _to_latex(tree.body, expression)
+    relation = "=" if exact else r"\approx"
+    return f"$${latex} {relation} {number}$$"
+
+
+def _normalize_name(text: str) -> str:
+    text = text.lower().replace("’", "'").replace("'", "")
+    return " ".join(text.split())
+
+
+def _build_lookup_index() -> Dict[str, Tuple[str, str]]:
+    index = {}
+    for subject, entries in FORMULA_DATABASE.items():
+        for name, entry in entries.items():
+            if name in _LOOKUP_LATEX:
+                index[_normalize_name(name)] = (subject, name)
+    return index
+
+
+_LOOKUP_INDEX = _build_lookup_index()
+
+
+def _answer_lookup(message: str, questions_only: bool = False) -> Optional[str]:
+    text = _normalize_name(message)
+    asked = text.endswith("?")
+    text = text.rstrip(_TRAILING_PUNCTUATION)
+    match = _LOOKUP_PREFIX.match(text)
+    asked = asked or bool(match.group())
+    asked_for_formula = match.group("kind") in ("formula", "equation")
+    text = text[match.end():]
+    if text not in _LOOKUP_INDEX and _LOOKUP_SUFFIX.search(text):
+        text = _LOOKUP_SUFFIX.sub("", text)
+        asked_for_formula = True
+    if text not in _LOOKUP_INDEX or (questions_only and not (asked or asked_for_formula)):
+        return None
+
+    subject, name = _LOOKUP_INDEX[text]
+    entry = formula_lookup_tool(name, subject, tool_context=None)
+    if "error" in entry:
+        return None
+    # "What is kinetic energy?" asks for an explanation, not the formula.
+    if "formula" in entry and not asked_for_formula and not re.search(r"formula|theorem|law", name):
+        return None
+    title = name[0].upper() + name[1:]
+    return f"**{title}**\n\n$${_LOOKUP_LATEX[name]}$$\n\n{entry['description']}"
+
+
+def answer_directly(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Answers pure arithmetic and exact formula/constant questions without
+    calling the model. Use as the last before_agent_callback. On sub-agents
+    only formula/constant questions are answered.
+
+    Args:
+        callback_context: The callback context.
+    Returns:
+        The reply, which ends the invocation, or None to run the agent.
+    """
+    if not FAST_PATH_ENABLED:
+        return None
+    message = _message_text(callback_context)
+    if not message:
+        return None
+
+    is_root = callback_context._invocation_context.agent.parent_agent is None
+    kind, answer = "arithmetic", _answer_arithmetic(message) if is_root else None
+    if answer is None:
+        kind, answer = "lookup", _answer_lookup(message, questions_only=not is_root)
+    if answer is None:
+        return None
+
+    logger.debug("Answered a %s question without the model", kind)
+    metrics.FAST_PATH_ANSWERS.labels(callback_context.agent_name, kind).inc()
+    # ADK skips the after_agent callbacks of an invocation that ends here.
+    trace_agent_end(callback_context)
+    return types.Content(role="model", parts=[types.Part(text=answer)])
@@ -1,6 +1,9 @@
 from datetime import datetime
 import json
+import logging
 import os
+import re
+from pathlib import Path
 from typing import Dict, Any
 
 from google.adk.agents.callback_context import CallbackContext
@@ -8,28 +11,105 @@ from google.adk.sessions.state import State
 from google.adk.tools import ToolContext
 
 from tutor_agent.shared_libs import constants
+from tutor_agent.shared_libs.file_cache import FileCache
+
+logger = logging.getLogger(__name__)
+
+# One JSON file per student, named <user_id>.json. default.json, if present,
+# applies to every student and is overridden field by field by their own file.
+STUDENT_PROFILE_DIR = os.environ.get(
+    "STUDENT_PROFILE_DIR", str(Path(__file__).resolve().parents[1] / "profiles")
+)
+STUDENT_PROFILE_CACHE_SIZE = int(os.environ.get("STUDENT_PROFILE_CACHE_SIZE", 1024))
+DEFAULT_PROFILE_NAME = "default"
+
+_VALID_USER_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.@-]{0,127}$")
+
+
+def _parse_student_profile(raw: bytes) -> Dict[str, Any]:
+    """
+    Parses and validates a student profile file.
+
+    Args:
+        raw: The file contents, a JSON object.
+    Returns:
+        The known profile fields found in the file.
+    Raises:
+        ValueError: If the file is not valid JSON or a field has the wrong type.
+    """
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("a student profile must be a JSON object")
+    profile = {}
+    for key in (constants.GRADE_LEVEL, constants.PREFERRED_UNITS):
+        if key in data:
+            if not isinstance(data[key], (str, int)):
+                raise ValueError(f"{key} must be a string")
+            profile[key] = str(data[key])
+    if constants.WEAK_TOPICS in data:
+        topics = data[constants.WEAK_TOPICS]
+        if not isinstance(topics, list) or not all(isinstance(t, str) for t in topics):
+            raise ValueError(f"{constants.WEAK_TOPICS} must be a list of strings")
+        profile[constants.WEAK_TOPICS] = topics
+    return profile
+
+
+_profile_cache = FileCache(
+    "student_profile", _parse_student_profile, maxsize=STUDENT_PROFILE_CACHE_SIZE
+)
+
+
+def load_student_profile(user_id: str) -> Dict[str, Any]:
+    """
+    Loads a student's profile from the profile store, through the shared cache.
+
+    Args:
+        user_id: The student's user id.
+    Returns:
+        The profile, with defaults for every missing field.
+    """
+    profile = dict(constants.DEFAULT_STUDENT_PROFILE)
+    default = _profile_cache.get(os.path.join(STUDENT_PROFILE_DIR, f"{DEFAULT_PROFILE_NAME}.json"))
+    if default:
+        profile.update(default)
+    # User ids come from the request path; never let one escape the store.
+    if user_id and user_id != DEFAULT_PROFILE_NAME and _VALID_USER_ID.match(user_id):
+        own = _profile_cache.get(os.path.join(STUDENT_PROFILE_DIR, f"{user_id}.json"))
+        if own:
+            profile.update(own)
+    return profile
 
 
 def _set_initial_states(source: Dict[str, Any], target: State | dict[str, Any]):
     """
     Setting the initial session state given a JSON object of states.
 
+    Only keys whose value changed are written, so an unchanged profile does
+    not add a state delta to the session on every turn.
+
     Args:
         source: A JSON object of states.
         target: The session state object to insert into.
     """
     if constants.SYSTEM_TIME not in target:
         target[constants.SYSTEM_TIME] = str(datetime.now())
+    for key, value in source.items():
+        if target.get(key) != value:
+            # Cached values are shared; give the session its own copy.
+            target[key] = list(value) if isinstance(value, list) else value
 
 
 def _load_precreated_itinerary(callback_context: CallbackContext):
     """
-    Sets up the initial state.
-    Set this as a callback as before_agent_call of the root_agent.
+    Sets up the initial state, including the student's profile.
+    Set this as a callback as before_agent_call of the root_agent and of every
+    sub-agent whose prompt reads the profile, since a session keeps talking to
+    the last agent it was transferred to.
     This gets called before the system instruction is contructed.
 
     Args:
         callback_context: The callback context.
     """
-    print("\nLoading Initial State\n")
-    _set_initial_states({}, callback_context.state)
+    logger.debug("Loading initial state")
+    user_id = callback_context._invocation_context.session.user_id
+    _set_initial_states(load_student_profile(user_id), callback_context.state)
@@ -0,0 +1,122 @@
+"""Concurrent execution of the tool calls of one model response.
+
+ADK 1.0 runs the function calls of a model response one after another, so a
+turn that asks for a formula lookup, a calculation and a plot takes as long
+as all three together. `dispatch_tool_calls` is a before_tool_callback that,
+when ADK reaches the first call of such a response, starts every call of the
+response at once. ADK still walks the calls in order, and for each one the
+callback returns the result of the call that is already running, so ADK does
+not run the tool itself. The responses are merged in their original order by
+ADK as usual.
+
+Only scheduled tools (see `shared_libs.scheduling`) are dispatched, so the
+per-tool and per-lane limits bound how much runs at once. Other calls, such as
+transfer_to_agent, are left to ADK. Each call gets its own ToolContext, whose
+state and artifact changes are merged into the context ADK creates for that
+call. An exception in one call becomes that call's error response and does
+not affect the others.
+
+Register it after trace_tool_start:
+    before_tool_callback=[trace_tool_start, dispatch_tool_calls]
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from google.adk.events import Event, EventActions
+from google.adk.tools import BaseTool, ToolContext
+from google.genai import types
+
+from tutor_agent.shared_libs.scheduling import ScheduledTool
+from tutor_agent.tools.tracing import mark_tool_finished, trace_tool_start
+
+logger = logging.getLogger(__name__)
+
+# Results ADK never asks for (e.g. the invocation failed) are dropped after this.
+_UNCLAIMED_TIMEOUT = 600.0
+
+# Running calls by function call id, with the context they run with.
+_running: Dict[str, "tuple[asyncio.Task, ToolContext]"] = {}
+
+
+def _find_function_calls(tool_context: ToolContext) -> List[types.FunctionCall]:
+    """Returns the function calls of the model response this call belongs to."""
+    events: List[Event] = tool_context._invocation_context.session.events
+    for event in reversed(events):
+        function_calls = event.get_function_calls()
+        if any(fc.id == tool_context.function_call_id for fc in function_calls):
+            return function_calls
+    return []
+
+
+async def _run_call(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Any:
+    try:
+        return await tool.run_async(args=args, tool_context=tool_context)
+    except Exception as e:
+        logger.exception("Tool %s failed", tool.name)
+        return {"error": f"Tool {tool.name} failed", "detail": str(e)}
+    finally:
+        mark_tool_finished(tool_context.function_call_id)
+
+
+def _merge_actions(target: EventActions, source: EventActions):
+    for name, value in source:
+        if isinstance(value, dict):
+            getattr(target, name).update(value)
+        elif value is not None:
+            setattr(target, name, value)
+
+
+def _start_calls(tool_context: ToolContext):
+    function_calls = _find_function_calls(tool_context)
+    agent = tool_context._invocation_context.agent
+    tools = {tool.name: tool for tool in agent.tools if isinstance(tool, ScheduledTool)}
+    dispatchable = [fc for fc in function_calls if fc.name in tools]
+    if len(dispatchable) < 2:
+        return
+
+    loop = asyncio.get_running_loop()
+    for function_call in dispatchable:
+        if function_call.id in _running:
+            continue
+        tool = tools[function_call.name]
+        args = function_call.args or {}
+        if function_call.id == tool_context.function_call_id:
+            call_context = tool_context
+        else:
+            call_context = ToolContext(
+                tool_context._invocation_context, function_call_id=function_call.id
+            )
+            # Start the call's span now; ADK's later trace_tool_start keeps it.
+            trace_tool_start(tool, args, call_context)
+        task = asyncio.create_task(_run_call(tool, args, call_context))
+        _running[function_call.id] = (task, call_context)
+        loop.call_later(_UNCLAIMED_TIMEOUT, _running.pop, function_call.id, None)
+
+
+async def dispatch_tool_calls(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+) -> Optional[Any]:
+    """
+    Runs all scheduled tool calls of a model response concurrently.
+    Use as a before_tool_callback, after trace_tool_start.
+
+    Returns:
+        The call's response, or None to let ADK run the call itself.
+    """
+    if tool_context.function_call_id not in _running:
+        _start_calls(tool_context)
+    entry = _running.pop(tool_context.function_call_id, None)
+    if entry is None:
+        return None
+
+    task, call_context = entry
+    response = await task
+    if call_context is not tool_context:
+        _merge_actions(tool_context.actions, call_context.actions)
+    # ADK runs the tool itself when a callback returns a falsy value, and
+    # wraps non-dict responses the same way.
+    if not isinstance(response, dict) or not response:
+        response = {"result": response}
+    return response
@@ -1,7 +1,11 @@
 from google.adk.tools import ToolContext
+import functools
 import json
 from typing import List
 
+from tutor_agent.shared_libs.executors import run_in_thread
+from tutor_agent.shared_libs.progress import ProgressReporter
+
 try:
     import numpy as np
     import plotly.graph_objects as go
@@ -39,7 +43,11 @@ def plotting_tool(
     Returns:
         A dictionary containing the Plotly figure JSON and metadata.
     """
+    # Streams subscribed to the session get each trace as it finishes
+    progress = ProgressReporter("plotting_tool", tool_context)
+
     if not PLOTTING_AVAILABLE:
+        progress.report("failed", detail="Plotting dependencies not available")
         return {
             "error": "Plotting dependencies not available", 
             "detail": "Please install numpy, plotly, and sympy to use plotting functionality."
@@ -48,15 +56,20 @@ def plotting_tool(
     try:
         # Validate inputs
         if not equations:
-            return {"error": "No equations provided"}
-        
-        if len(x_range) != 2 or x_range[0] >= x_range[1]:
-            return {"error": "Invalid x_range. Must be [min, max] where min < max"}
-        
+            error = "No equations provided"
+        elif len(x_range) != 2 or x_range[0] >= x_range[1]:
+            error = "Invalid x_range. Must be [min, max] where min < max"
         # Validate labels
-        if len(labels) != len(equations):
-            return {"error": "Number of labels must match number of equations"}
-        
+        elif len(labels) != len(equations):
+            error = "Number of labels must match number of equations"
+        else:
+            error = None
+        if error:
+            progress.report("failed", detail=error)
+            return {"error": error}
+
+        progress.report("started", traces=len(equations))
+
         # Generate x values
         x_values = np.linspace(x_range[0], x_range[1], 1000)
         x_symbol = symbols('x')
@@ -97,8 +110,18 @@ def plotting_tool(
                         name=labels[i],
                         line=dict(width=2)
                     ))
+
+                if progress.enabled:
+                    progress.report(
+                        "trace_done",
+                        index=i,
+                        traces=len(equations),
+                        label=labels[i],
+                        trace=json.loads(pio.to_json(fig.data[-1].to_plotly_json())),
+                    )
                 
             except Exception as e:
+                progress.report("failed", index=i, detail=str(e))
                 return {
                     "error": f"Failed to process equation '{equation_str}'",
                     "detail": str(e)
@@ -116,6 +139,7 @@ def plotting_tool(
         
         # Convert to JSON for frontend
         plot_json = pio.to_json(fig)
+        progress.report("completed", traces=len(equations))
         
         return {
             "success": True,
@@ -127,7 +151,33 @@ def plotting_tool(
         }
         
     except Exception as e:
+        progress.report("failed", detail=str(e))
         return {
             "error": "Failed to generate plot",
             "detail": str(e)
-        }
\ No newline at end of file
+        }
+
+
+@functools.wraps(plotting_tool)
+async def plotting_tool_async(
+    equations: List[str],
+    x_range: List[float],
+    tool_context: ToolContext,
+    labels: List[str],
+    title: str,
+    x_label: str,
+    y_label: str,
+    plot_type: str
+) -> dict:
+    # NumPy evaluation releases the GIL, so a thread is enough here.
+    return await run_in_thread(
+        plotting_tool,
+        equations,
+        x_range,
+        tool_context,
+        labels,
+        title,
+        x_label,
+        y_label,
+        plot_type,
+    )
@@ -1,5 +1,10 @@
+import functools
+
 from google.adk.tools import ToolContext
 
+from tutor_agent.shared_libs.executors import run_in_process
+from tutor_agent.shared_libs.progress import ProgressReporter, with_heartbeat
+
 try:
     from sympy.parsing.sympy_parser import parse_expr
     from sympy import symbols, solve, diff, integrate, expand, factor, simplify, limit, oo
@@ -80,4 +85,22 @@ def symbolic_math_tool(operation: str, expression: str, tool_context: ToolContex
             return {"error": "Unsupported operation", "supported_operations": ["solve", "derivative", "integral", "expand", "factor", "simplify", "limit"]}
             
     except Exception as e:
-        return {"error": str(e), "detail": "Failed to perform symbolic math operation."}
\ No newline at end of file
+        return {"error": str(e), "detail": "Failed to perform symbolic math operation."}
+
+
+@functools.wraps(symbolic_math_tool)
+async def symbolic_math_tool_async(operation: str, expression: str, tool_context: ToolContext, variable: str = "x", limit_point: str = "0") -> dict:
+    # SymPy holds the GIL, so it runs in a worker process. The ToolContext is
+    # not picklable and the sync tool does not use it, so the worker cannot
+    # report stages; only start, heartbeats and the end are sent.
+    progress = ProgressReporter("symbolic_math_tool", tool_context)
+    progress.report("started", operation=operation, expression=expression)
+    try:
+        result = await with_heartbeat(
+            run_in_process(symbolic_math_tool, operation, expression, None, variable, limit_point),
+            progress,
+        )
+    except Exception as e:
+        result = {"error": str(e), "detail": "Failed to perform symbolic math operation."}
+    progress.report("failed" if "error" in result else "completed")
+    return result
@@ -0,0 +1,270 @@
+"""Tracing callbacks for agents, model calls, transfers and tool calls.
+
+Every callback records a latency/size sample into `shared_libs.metrics` and,
+when the `tutor_agent.trace` logger is enabled at INFO, emits one JSON line per
+finished span. Spans share the invocation id as their trace id, and model and
+tool spans are parented to the span of the agent that issued them.
+
+Register the callbacks on every agent:
+    before_agent_callback=trace_agent_start, after_agent_callback=trace_agent_end,
+    before_model_callback=trace_model_start, after_model_callback=trace_model_end,
+    before_tool_callback=trace_tool_start, after_tool_callback=trace_tool_end
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+
+from tutor_agent.shared_libs import metrics
+
+trace_logger = logging.getLogger("tutor_agent.trace")
+
+# Open spans are closed by the after-callbacks, which ADK skips when a model
+# or tool call raises. Spans older than this, or beyond the size limit, are
+# dropped so that failed invocations do not accumulate.
+OPEN_SPAN_TTL = 15 * 60
+MAX_OPEN_SPANS = 10000
+
+
+class _OpenSpans(OrderedDict):
+    """Open spans in start order, keyed by (invocation id, agent name) or function call id."""
+
+    def __setitem__(self, key, span):
+        super().__setitem__(key, span)
+        self.move_to_end(key)
+        cutoff = time.perf_counter() - OPEN_SPAN_TTL
+        while self and (len(self) > MAX_OPEN_SPANS or next(iter(self.values()))["_perf_start"] < cutoff):
+            self.popitem(last=False)
+
+
+_agent_spans: Dict[Any, Dict[str, Any]] = _OpenSpans()
+_model_spans: Dict[Any, Dict[str, Any]] = _OpenSpans()
+_tool_spans: Dict[Any, Dict[str, Any]] = _OpenSpans()
+# Transfers requested by a model, keyed by (invocation id, target agent) and
+# closed when the target agent starts.
+_transfer_spans: Dict[Any, Dict[str, Any]] = _OpenSpans()
+
+# Sizes of tool responses by function call id, so that model requests which
+# carry them back to the model are not re-serialized on every call.
+_RESPONSE_SIZE_CACHE_SIZE = 4096
+_response_sizes: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def _session_id(callback_context: CallbackContext) -> str:
+    return callback_context._invocation_context.session.id
+
+
+def _payload_bytes(payload: Any) -> int:
+    try:
+        return len(json.dumps(payload, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return len(str(payload))
+
+
+def _contents_bytes(contents) -> int:
+    total = 0
+    for content in contents or []:
+        for part in content.parts or []:
+            if part.text:
+                total += len(part.text)
+            elif part.function_call:
+                total += _payload_bytes(part.function_call.args or {})
+            elif part.function_response:
+                size = _response_sizes.get(part.function_response.id)
+                if size is None:
+                    size = _payload_bytes(part.function_response.response or {})
+                total += size
+    return total
+
+
+def _start_span(kind: str, name: str, trace_id: str, parent_id: Optional[str], session_id: str) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "name": name,
+        "trace_id": trace_id,
+        "span_id": _new_span_id(),
+        "parent_id": parent_id,
+        "session_id": session_id,
+        "start": time.time(),
+        "_perf_start": time.perf_counter(),
+    }
+
+
+def _end_span(span: Dict[str, Any], **attributes) -> float:
+    end = span.pop("_perf_end", None) or time.perf_counter()
+    duration = end - span.pop("_perf_start")
+    if trace_logger.isEnabledFor(logging.INFO):
+        span["duration_ms"] = round(duration * 1000, 3)
+        span.update(attributes)
+        trace_logger.info(json.dumps(span, default=str))
+    return duration
+
+
+def _agent_span_id(callback_context: CallbackContext) -> Optional[str]:
+    span = _agent_spans.get((callback_context.invocation_id, callback_context.agent_name))
+    return span["span_id"] if span else None
+
+
+def trace_agent_start(callback_context: CallbackContext):
+    """Opens the span of an agent invocation. Use as a before_agent_callback."""
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    parent = _agent_spans.get((callback_context.invocation_id, None))
+    span = _start_span(
+        "agent",
+        callback_context.agent_name,
+        callback_context.invocation_id,
+        parent["span_id"] if parent else None,
+        _session_id(callback_context),
+    )
+    _agent_spans[key] = span
+    # The first agent of an invocation is the parent of the ones it transfers to.
+    if (callback_context.invocation_id, None) not in _agent_spans:
+        _agent_spans[(callback_context.invocation_id, None)] = span
+    transfer = _transfer_spans.pop(key, None)
+    if transfer is not None:
+        _end_span(transfer, source=transfer.pop("source"), target=callback_context.agent_name)
+
+
+def trace_agent_end(callback_context: CallbackContext):
+    """Closes the span of an agent invocation. Use as an after_agent_callback."""
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    span = _agent_spans.pop(key, None)
+    if span is None:
+        return
+    root = _agent_spans.get((callback_context.invocation_id, None))
+    if root is span:
+        del _agent_spans[(callback_context.invocation_id, None)]
+    duration = _end_span(span)
+    metrics.AGENT_DURATION.labels(callback_context.agent_name).observe(duration)
+
+
+def trace_model_start(callback_context: CallbackContext, llm_request: LlmRequest):
+    """Opens the span of a model call. Use as a before_model_callback."""
+    span = _start_span(
+        "model",
+        llm_request.model or "",
+        callback_context.invocation_id,
+        _agent_span_id(callback_context),
+        _session_id(callback_context),
+    )
+    span["request_bytes"] = _contents_bytes(llm_request.contents)
+    _model_spans[(callback_context.invocation_id, callback_context.agent_name)] = span
+
+
+def trace_model_end(callback_context: CallbackContext, llm_response: LlmResponse):
+    """
+    Closes the span of a model call and records requested transfers.
+    Use as an after_model_callback.
+    """
+    key = (callback_context.invocation_id, callback_context.agent_name)
+    span = _model_spans.pop(key, None)
+    if span is None:
+        return
+    agent_name = callback_context.agent_name
+    contents = [llm_response.content] if llm_response.content else []
+    response_bytes = _contents_bytes(contents)
+
+    function_calls = [
+        part.function_call
+        for content in contents
+        for part in content.parts or []
+        if part.function_call
+    ]
+    for function_call in function_calls:
+        if function_call.name == "transfer_to_agent":
+            target = (function_call.args or {}).get("agent_name", "")
+            metrics.TRANSFERS.labels(agent_name, target).inc()
+            # Lasts until the target agent starts; see trace_agent_start.
+            transfer = _start_span(
+                "transfer",
+                f"{agent_name} -> {target}",
+                span["trace_id"],
+                span["span_id"],
+                span["session_id"],
+            )
+            transfer["source"] = agent_name
+            _transfer_spans[(callback_context.invocation_id, target)] = transfer
+
+    attributes = {
+        "agent": agent_name,
+        "request_bytes": span.pop("request_bytes"),
+        "response_bytes": response_bytes,
+        "function_calls": [function_call.name for function_call in function_calls],
+    }
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        if usage.prompt_token_count:
+            metrics.MODEL_TOKENS.labels(agent_name, "prompt").inc(usage.prompt_token_count)
+            attributes["prompt_tokens"] = usage.prompt_token_count
+        if usage.candidates_token_count:
+            metrics.MODEL_TOKENS.labels(agent_name, "candidates").inc(usage.candidates_token_count)
+            attributes["candidates_tokens"] = usage.candidates_token_count
+    if llm_response.error_code:
+        attributes["error_code"] = llm_response.error_code
+
+    duration = _end_span(span, **attributes)
+    metrics.MODEL_DURATION.labels(agent_name).observe(duration)
+    metrics.PAYLOAD_BYTES.labels("model_request").observe(attributes["request_bytes"])
+    metrics.PAYLOAD_BYTES.labels("model_response").observe(response_bytes)
+
+
+def trace_tool_start(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext):
+    """
+    Opens the span of a tool call. Use as a before_tool_callback.
+    A span already opened for the call, e.g. by `dispatch_tool_calls`, is kept.
+    """
+    if tool_context.function_call_id in _tool_spans:
+        return
+    span = _start_span(
+        "tool",
+        tool.name,
+        tool_context.invocation_id,
+        _agent_span_id(tool_context),
+        _session_id(tool_context),
+    )
+    span["args_bytes"] = _payload_bytes(args)
+    _tool_spans[tool_context.function_call_id] = span
+
+
+def mark_tool_finished(function_call_id: str):
+    """
+    Records when a tool call finished, for calls whose after_tool callbacks
+    run later, e.g. calls started by `dispatch_tool_calls`.
+    """
+    span = _tool_spans.get(function_call_id)
+    if span is not None:
+        span["_perf_end"] = time.perf_counter()
+
+
+def trace_tool_end(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any):
+    """Closes the span of a tool call. Use as an after_tool_callback."""
+    span = _tool_spans.pop(tool_context.function_call_id, None)
+    if span is None:
+        return
+    response_bytes = _payload_bytes(tool_response)
+    _response_sizes[tool_context.function_call_id] = response_bytes
+    if len(_response_sizes) > _RESPONSE_SIZE_CACHE_SIZE:
+        _response_sizes.popitem(last=False)
+
+    status = "ok"
+    if isinstance(tool_response, dict) and "error" in tool_response:
+        status = "busy" if tool_response["error"] == "busy" else "error"
+    args_bytes = span.pop("args_bytes")
+    duration = _end_span(
+        span, status=status, args_bytes=args_bytes, response_bytes=response_bytes
+    )
+    metrics.TOOL_DURATION.labels(tool.name).observe(duration)
+    metrics.TOOL_CALLS.labels(tool.name, status).inc()
+    metrics.PAYLOAD_BYTES.labels("tool_args").observe(args_bytes)
+    metrics.PAYLOAD_BYTES.labels("tool_response").observe(response_bytes)
@@ -0,0 +1,549 @@
+"""Unit-aware calculations for physics problems.
+
+Quantities are NumPy arrays of SI magnitudes paired with a vector of exponents
+of the seven SI base dimensions. Unit symbols, including every SI-prefixed
+form, are resolved through a table built once at import, and parsed unit
+expressions are cached, so checking and converting units is a table lookup
+followed by array arithmetic.
+
+Values are written the way they appear in prompts, in circuit components and
+in `FORMULA_DATABASE`: "299,792,458 m/s", "6.62607015 * 10^-34 J·s", "1kΩ",
+"100 µF", "9.81 m/s²" or "[1, 2.5, 4] km/h". The constants of
+`formula_lookup_tool` (e.g. `c`, `h`) can be used by name.
+"""
+
+import ast
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+from google.adk.tools import ToolContext
+
+from tutor_agent.tools.formula_lookup import FORMULA_DATABASE
+
+logger = logging.getLogger(__name__)
+
+BASE_DIMENSIONS = ("m", "kg", "s", "A", "K", "mol", "cd")
+
+Dimensions = Tuple[int, ...]
+
+
+def _dims(m=0, kg=0, s=0, A=0, K=0, mol=0, cd=0) -> Dimensions:
+    return (m, kg, s, A, K, mol, cd)
+
+
+DIMENSIONLESS = _dims()
+
+# symbol -> (SI scale, dimensions). These take SI prefixes.
+_PREFIXABLE_UNITS: Dict[str, Tuple[float, Dimensions]] = {
+    "m": (1.0, _dims(m=1)),
+    "g": (1e-3, _dims(kg=1)),
+    "s": (1.0, _dims(s=1)),
+    "A": (1.0, _dims(A=1)),
+    "K": (1.0, _dims(K=1)),
+    "mol": (1.0, _dims(mol=1)),
+    "cd": (1.0, _dims(cd=1)),
+    "Hz": (1.0, _dims(s=-1)),
+    "N": (1.0, _dims(m=1, kg=1, s=-2)),
+    "Pa": (1.0, _dims(m=-1, kg=1, s=-2)),
+    "J": (1.0, _dims(m=2, kg=1, s=-2)),
+    "W": (1.0, _dims(m=2, kg=1, s=-3)),
+    "C": (1.0, _dims(s=1, A=1)),
+    "V": (1.0, _dims(m=2, kg=1, s=-3, A=-1)),
+    "F": (1.0, _dims(m=-2, kg=-1, s=4, A=2)),
+    "Ω": (1.0, _dims(m=2, kg=1, s=-3, A=-2)),
+    "ohm": (1.0, _dims(m=2, kg=1, s=-3, A=-2)),
+    "S": (1.0, _dims(m=-2, kg=-1, s=3, A=2)),
+    "Wb": (1.0, _dims(m=2, kg=1, s=-2, A=-1)),
+    "T": (1.0, _dims(kg=1, s=-2, A=-1)),
+    "H": (1.0, _dims(m=2, kg=1, s=-2, A=-2)),
+    "L": (1e-3, _dims(m=3)),
+    "l": (1e-3, _dims(m=3)),
+    "eV": (1.602176634e-19, _dims(m=2, kg=1, s=-2)),
+    "Wh": (3600.0, _dims(m=2, kg=1, s=-2)),
+    "bar": (1e5, _dims(m=-1, kg=1, s=-2)),
+    "cal": (4.184, _dims(m=2, kg=1, s=-2)),
+}
+
+_OTHER_UNITS: Dict[str, Tuple[float, Dimensions]] = {
+    "min": (60.0, _dims(s=1)),
+    "h": (3600.0, _dims(s=1)),
+    "day": (86400.0, _dims(s=1)),
+    "in": (0.0254, _dims(m=1)),
+    "ft": (0.3048, _dims(m=1)),
+    "mi": (1609.344, _dims(m=1)),
+    "mph": (0.44704, _dims(m=1, s=-1)),
+    "lb": (0.45359237, _dims(kg=1)),
+    "lbf": (4.4482216152605, _dims(m=1, kg=1, s=-2)),
+    "psi": (6894.757293168361, _dims(m=-1, kg=1, s=-2)),
+    "atm": (101325.0, _dims(m=-1, kg=1, s=-2)),
+    "mmHg": (133.322387415, _dims(m=-1, kg=1, s=-2)),
+    "rad": (1.0, DIMENSIONLESS),
+    "deg": (math.pi / 180, DIMENSIONLESS),
+    "°": (math.pi / 180, DIMENSIONLESS),
+    "%": (1e-2, DIMENSIONLESS),
+}
+
+SI_PREFIXES = {
+    "Y": 1e24, "Z": 1e21, "E": 1e18, "P": 1e15, "T": 1e12, "G": 1e9,
+    "M": 1e6, "k": 1e3, "h": 1e2, "da": 1e1, "d": 1e-1, "c": 1e-2,
+    "m": 1e-3, "μ": 1e-6, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15,
+    "a": 1e-18, "z": 1e-21, "y": 1e-24,
+}
+
+
+def _build_unit_table() -> Dict[str, Tuple[float, np.ndarray]]:
+    table = {**_PREFIXABLE_UNITS, **_OTHER_UNITS}
+    for symbol, (scale, dims) in _PREFIXABLE_UNITS.items():
+        for prefix, factor in SI_PREFIXES.items():
+            # Plain symbols win over prefixed readings, e.g. "min" and "ft".
+            table.setdefault(prefix + symbol, (factor * scale, dims))
+    return {symbol: (scale, np.array(dims, dtype=np.int64)) for symbol, (scale, dims) in table.items()}
+
+
+UNIT_TABLE = _build_unit_table()
+
+# Preferred names for derived dimensions when formatting results.
+_NAMED_DIMENSIONS = {
+    _PREFIXABLE_UNITS[symbol][1]: symbol
+    for symbol in ("N", "Pa", "J", "W", "C", "V", "F", "Ω", "S", "Wb", "T", "H")
+}
+
+_SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺", "0123456789-+")
+_SUPERSCRIPT_RUN = re.compile(r"[⁻⁺]?[⁰¹²³⁴⁵⁶⁷⁸⁹]+")
+# Look-alike code points: micro sign, ohm sign, minus sign.
+_LOOKALIKES = str.maketrans({"µ": "μ", "Ω": "Ω", "−": "-"})
+
+_QUANTITY = re.compile(
+    r"""^\s*
+    (?P<number>[+-]?(?:\d{1,3}(?:,\d{3})+(?:\.\d*)?|\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    \s*(?:[*×·]\s*10\s*\^\s*\(?(?P<exponent>[+-]?\d+)\)?)?
+    \s*(?P<unit>.*?)\s*$""",
+    re.VERBOSE,
+)
+_ARRAY_QUANTITY = re.compile(r"^\s*\[(?P<values>[^\]]*)\]\s*(?P<unit>.*?)\s*$")
+_UNIT_TOKEN = re.compile(r"\s*(?:(?P<number>[+-]?\d+(?:\.\d+)?)|(?P<op>[*·⋅×/^()])|(?P<symbol>[^\s*·⋅×/^()\d+-]+))")
+_OFFSET_TEMPERATURE = re.compile(r"°\s*[CF]\b|\bdeg[CF]\b")
+
+
+def _normalize(text: str) -> str:
+    text = text.translate(_LOOKALIKES)
+    return _SUPERSCRIPT_RUN.sub(lambda match: "^" + match.group().translate(_SUPERSCRIPTS), text)
+
+
+class Quantity:
+    """A scalar or array of values in SI units, with their dimensions."""
+
+    __slots__ = ("value", "dims")
+
+    def __init__(self, value, dims=DIMENSIONLESS):
+        self.value = np.asarray(value, dtype=np.float64)
+        self.dims = np.asarray(dims, dtype=np.int64)
+
+    @classmethod
+    def coerce(cls, other) -> "Quantity":
+        return other if isinstance(other, Quantity) else cls(other)
+
+    @property
+    def dimensionless(self) -> bool:
+        return not self.dims.any()
+
+    def _same_dims(self, other: "Quantity", operation: str):
+        if not np.array_equal(self.dims, other.dims):
+            raise ValueError(
+                f"cannot {operation} {format_unit(self.dims) or '1'} and {format_unit(other.dims) or '1'}"
+            )
+
+    def __add__(self, other):
+        other = Quantity.coerce(other)
+        self._same_dims(other, "add")
+        return Quantity(self.value + other.value, self.dims)
+
+    def __sub__(self, other):
+        other = Quantity.coerce(other)
+        self._same_dims(other, "subtract")
+        return Quantity(self.value - other.value, self.dims)
+
+    def __mul__(self, other):
+        other = Quantity.coerce(other)
+        return Quantity(self.value * other.value, self.dims + other.dims)
+
+    def __truediv__(self, other):
+        other = Quantity.coerce(other)
+        return Quantity(self.value / other.value, self.dims - other.dims)
+
+    def __pow__(self, other):
+        exponent = Quantity.coerce(other)
+        if not exponent.dimensionless or exponent.value.ndim:
+            raise ValueError("exponents must be dimensionless numbers")
+        power = float(exponent.value)
+        if not math.isfinite(power):
+            raise ValueError("the exponent is not finite (out of range)")
+        dims = self.dims * power
+        if not np.allclose(dims, np.round(dims)):
+            raise ValueError(f"({format_unit(self.dims)})^{power:g} has fractional dimensions")
+        return Quantity(self.value**power, np.round(dims))
+
+    def __neg__(self):
+        return Quantity(-self.value, self.dims)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Quantity(np.abs(self.value), self.dims)
+
+    def to(self, unit: str) -> np.ndarray:
+        """
+        Returns the values expressed in `unit`.
+
+        Raises:
+            ValueError: If `unit` is unknown or has other dimensions.
+        """
+        scale, dims = parse_unit(unit)
+        if not np.array_equal(self.dims, dims):
+            raise ValueError(f"cannot convert {format_unit(self.dims) or '1'} to {unit}")
+        return self.value / scale
+
+
+def parse_unit(text: str) -> Tuple[float, Dimensions]:
+    """
+    Parses a unit expression such as "kg·m/s^2", "J/(mol·K)", "kΩ" or "m s⁻¹".
+
+    Args:
+        text: The unit expression; an empty string is dimensionless.
+    Returns:
+        The SI scale of the unit and its base dimension exponents.
+    Raises:
+        ValueError: If the expression is malformed, names an unknown unit or
+            is not a string.
+    """
+    if not isinstance(text, str):
+        raise ValueError(f"a unit must be a string, got {text!r}")
+    return _parse_unit(text)
+
+
+@lru_cache(maxsize=1024)
+def _parse_unit(text: str) -> Tuple[float, Dimensions]:
+    text = _normalize(text).strip()
+    if _OFFSET_TEMPERATURE.search(text):
+        raise ValueError("temperature scales with an offset are not supported; use K")
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _UNIT_TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"cannot parse unit '{text}'")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+    if not tokens:
+        return 1.0, DIMENSIONLESS
+
+    index = 0
+
+    def peek():
+        return tokens[index] if index < len(tokens) else (None, None)
+
+    def primary():
+        nonlocal index
+        kind, token = peek()
+        index += 1
+        if kind == "symbol":
+            if token not in UNIT_TABLE:
+                raise ValueError(f"unknown unit '{token}'")
+            scale, dims = UNIT_TABLE[token]
+            return scale, dims
+        if kind == "number" and not token.startswith(("-", "+")):
+            return float(token), np.zeros(len(BASE_DIMENSIONS), dtype=np.int64)
+        if token == "(":
+            result = product()
+            if peek()[1] != ")":
+                raise ValueError(f"unbalanced parentheses in '{text}'")
+            index += 1
+            return result
+        raise ValueError(f"unexpected '{token}' in unit '{text}'")
+
+    def factor():
+        nonlocal index
+        scale, dims = primary()
+        if peek()[1] == "^":
+            index += 1
+            kind, token = peek()
+            if kind != "number" or not float(token).is_integer():
+                raise ValueError(f"unit exponents must be integers in '{text}'")
+            index += 1
+            power = int(float(token))
+            scale, dims = scale**power, dims * power
+        return scale, dims
+
+    def product():
+        nonlocal index
+        scale, dims = factor()
+        while True:
+            kind, token = peek()
+            if token in ("*", "·", "⋅", "×"):
+                index += 1
+                other_scale, other_dims = factor()
+                scale, dims = scale * other_scale, dims + other_dims
+            elif token == "/":
+                index += 1
+                other_scale, other_dims = factor()
+                scale, dims = scale / other_scale, dims - other_dims
+            elif kind in ("symbol", "number") or token == "(":
+                other_scale, other_dims = factor()
+                scale, dims = scale * other_scale, dims + other_dims
+            else:
+                return scale, dims
+
+    scale, dims = product()
+    if index != len(tokens):
+        raise ValueError(f"unexpected '{tokens[index][1]}' in unit '{text}'")
+    return scale, tuple(int(d) for d in dims)
+
+
+def parse_quantity(text: str) -> Quantity:
+    """
+    Parses a value with a unit, e.g. "299,792,458 m/s", "6.62607015 * 10^-34 J·s",
+    "1kΩ", "100μF" or "[1, 2, 3] km/h".
+
+    Args:
+        text: The quantity, or the name of a constant from `formula_lookup_tool`.
+            Plain numbers and lists of numbers are dimensionless.
+    Returns:
+        The quantity in SI units.
+    Raises:
+        ValueError: If the value or its unit cannot be parsed.
+    """
+    # Models sometimes send unitless values as JSON numbers.
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return Quantity(text)
+    if isinstance(text, list) and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in text
+    ):
+        return Quantity(text)
+    if not isinstance(text, str):
+        raise ValueError(f"a quantity must be a string such as \"2 kg\", got {text!r}")
+    if text.strip() in CONSTANTS:
+        return CONSTANTS[text.strip()]
+    normalized = _normalize(text)
+    array_match = _ARRAY_QUANTITY.match(normalized)
+    if array_match:
+        values = np.array([float(v) for v in array_match.group("values").split(",") if v.strip()])
+        unit = array_match.group("unit")
+    else:
+        match = _QUANTITY.match(normalized)
+        if match is None:
+            raise ValueError(f"cannot parse quantity '{text}'")
+        values = float(match.group("number").replace(",", ""))
+        if match.group("exponent"):
+            values *= 10.0 ** int(match.group("exponent"))
+        unit = match.group("unit")
+    scale, dims = parse_unit(unit)
+    return Quantity(np.asarray(values) * scale, dims)
+
+
+def format_unit(dims) -> str:
+    """Formats dimensions as an SI unit, e.g. "J" or "kg·m^2·s^-1"."""
+    dims = tuple(int(d) for d in dims)
+    if dims in _NAMED_DIMENSIONS:
+        return _NAMED_DIMENSIONS[dims]
+    parts = []
+    for symbol, power in zip(BASE_DIMENSIONS, dims):
+        if power == 1:
+            parts.append(symbol)
+        elif power:
+            parts.append(f"{symbol}^{power}")
+    return "·".join(parts)
+
+
+def _load_constants() -> Dict[str, Quantity]:
+    constants = {}
+    for entries in FORMULA_DATABASE.values():
+        for name, entry in entries.items():
+            if "constant" in entry and "value" in entry:
+                try:
+                    constants[entry["constant"]] = parse_quantity(entry["value"])
+                except ValueError:
+                    logger.warning("Cannot parse the value of %s: %s", name, entry["value"])
+    return constants
+
+
+CONSTANTS: Dict[str, Quantity] = {}
+CONSTANTS.update(_load_constants())
+
+
+def _unary(name: str, func):
+    def apply(quantity: Quantity) -> Quantity:
+        if not quantity.dimensionless:
+            raise ValueError(f"{name}() needs a dimensionless argument, got {format_unit(quantity.dims)}")
+        return Quantity(func(quantity.value))
+
+    return apply
+
+
+_FUNCTIONS = {
+    "sqrt": lambda q: q**0.5,
+    "abs": abs,
+    **{
+        name: _unary(name, getattr(np, numpy_name))
+        for name, numpy_name in (
+            ("sin", "sin"), ("cos", "cos"), ("tan", "tan"),
+            ("asin", "arcsin"), ("acos", "arccos"), ("atan", "arctan"),
+            ("exp", "exp"), ("log", "log"), ("ln", "log"), ("log10", "log10"),
+        )
+    },
+}
+_NAMES = {"pi": Quantity(math.pi), "e": Quantity(math.e)}
+_BINARY_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Pow: lambda a, b: a**b,
+}
+# Keeps the parser and `visit` within the recursion limit.
+MAX_EXPRESSION_LENGTH = 500
+
+
+def evaluate(expression: str, quantities: Dict[str, Quantity]) -> Quantity:
+    """
+    Evaluates an arithmetic expression over named quantities.
+
+    Args:
+        expression: e.g. "0.5 * m * v^2". Names resolve to `quantities`, then
+            to the constants of `formula_lookup_tool`, then to pi and e.
+        quantities: The quantities the expression refers to.
+    Returns:
+        The result in SI units.
+    Raises:
+        ValueError: If the expression is not plain arithmetic, a name is
+            unknown or the dimensions do not match.
+    """
+    if not isinstance(expression, str):
+        raise ValueError(f"the expression must be a string such as \"V / R\", got {expression!r}")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"the expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        source = expression.replace("^", "**")
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"invalid expression: {e.msg}") from e
+
+    def visit(node) -> Quantity:
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            try:
+                return Quantity(node.value)
+            except OverflowError:
+                raise ValueError(f"the number {ast.get_source_segment(source, node)[:20]}... is too large")
+        if isinstance(node, ast.Name):
+            for scope in (quantities, CONSTANTS, _NAMES):
+                if node.id in scope:
+                    return scope[node.id]
+            raise ValueError(f"unknown name '{node.id}'")
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            return _BINARY_OPERATORS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = visit(node.operand)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            return _FUNCTIONS[node.func.id](visit(node.args[0]))
+        raise ValueError(f"unsupported syntax: {ast.unparse(node)}")
+
+    try:
+        return visit(tree)
+    except RecursionError:
+        raise ValueError("the expression is nested too deeply")
+
+
+def _to_json(values: np.ndarray) -> Union[float, List[float]]:
+    return values.tolist() if values.ndim else float(values)
+
+
+def unit_calculator_tool(
+    expression: str,
+    quantities: Dict[str, str],
+    tool_context: ToolContext,
+    to_unit: str = "",
+) -> dict:
+    """
+    Evaluates an expression over quantities with units, checking dimensions.
+    Args:
+        expression: The expression over the quantity names (e.g., "0.5 * m * v^2", "V / R").
+            The constants from formula_lookup_tool can be used by their symbol (e.g., "c", "h").
+        quantities: The values by name, with units (e.g., {"m": "2 kg", "v": "[1, 2, 3] m/s"}, {"V": "12V", "R": "1kΩ"}).
+        tool_context: The ADK tool context.
+        to_unit: Optional unit for the result (e.g., "mJ", "km/h"). Defaults to SI units.
+    Returns:
+        A dictionary with the result and its unit, e.g. {"result": 0.012, "unit": "A"}, or an error.
+    """
+    try:
+        if not isinstance(quantities, dict):
+            raise ValueError("quantities must map names to values, e.g. {\"m\": \"2 kg\"}")
+        parsed = {name: parse_quantity(value) for name, value in quantities.items()}
+        with np.errstate(all="ignore"):
+            result = evaluate(expression, parsed)
+        if not np.all(np.isfinite(result.value)):
+            raise ValueError("the result is not finite (division by zero or out of range)")
+        response = {"result": _to_json(result.value), "unit": format_unit(result.dims)}
+        if to_unit:
+            response = {
+                "result": _to_json(result.to(to_unit)),
+                "unit": to_unit,
+                "si_result": response["result"],
+                "si_unit": response["unit"],
+            }
+        return response
+    except ValueError as e:
+        return {"error": str(e), "detail": "Failed to evaluate the expression with units."}
+
+
+def unit_conversion_tool(quantities: List[str], to_unit: str, tool_context: ToolContext) -> dict:
+    """
+    Converts quantities to one unit in a single call.
+    Args:
+        quantities: The values with units, or constant symbols from formula_lookup_tool
+            (e.g., ["1kΩ", "470 Ω", "2.2 MΩ"], ["60 mph", "c"]).
+        to_unit: The target unit (e.g., "Ω", "km/h").
+        tool_context: The ADK tool context.
+    Returns:
+        A dictionary with the converted values in input order, e.g. {"results": [1000.0, 470.0, 2200000.0], "unit": "Ω"}.
+    """
+    try:
+        scale, dims = parse_unit(to_unit)
+        if not isinstance(quantities, list):
+            raise ValueError("quantities must be a list of values with units")
+        parsed = [parse_quantity(q) for q in quantities]
+    except ValueError as e:
+        return {"error": str(e), "detail": "Failed to parse the quantities."}
+    if not parsed:
+        return {"results": [], "unit": to_unit}
+
+    mismatched = np.flatnonzero(np.any(np.stack([q.dims for q in parsed]) != np.array(dims), axis=1))
+    if mismatched.size:
+        return {
+            "error": "Incompatible units",
+            "detail": "; ".join(
+                f"{quantities[i]} is {format_unit(parsed[i].dims) or 'dimensionless'}, not {to_unit}"
+                for i in mismatched
+            ),
+        }
+    sizes = [q.value.size for q in parsed]
+    converted = np.concatenate([q.value.ravel() for q in parsed]) / scale
+    pieces = np.split(converted, np.cumsum(sizes)[:-1])
+    results = [
+        _to_json(piece.reshape(q.value.shape)) for piece, q in zip(pieces, parsed)
+    ]
+    return {"results": results, "unit": to_unit}